@@ -4,8 +4,10 @@ import math
 import itertools
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+try:
+    from src import figure_render
+except ImportError:
+    import figure_render
 
 def _detect_datetime_columns(df):
     dt_cols = []
@@ -119,50 +121,34 @@ def _duplicate_analysis(df):
 def _ensure_dir(d):
     os.makedirs(d, exist_ok=True)
 
-def _plot_numeric_histograms(df, num_cols, out_dir):
+def _plot_numeric_histograms(df, num_cols, out_dir, queue):
     imgs = []
     cols = num_cols[:10]
     for c in cols:
         s = pd.to_numeric(df[c], errors='coerce')
-        plt.figure(figsize=(8,5))
-        sns.histplot(s, bins=30, kde=True)
-        plt.title(f"Histograma: {c}")
-        plt.xlabel(c)
-        plt.tight_layout()
         fn = os.path.join(out_dir, f"eda_hist_{c}.png")
-        plt.savefig(fn)
-        plt.close()
+        queue.append(figure_render.hist_spec(s, fn, f"Histograma: {c}", c, bins=30))
         imgs.append(fn)
     return imgs
 
-def _plot_categorical_bars(df, cat_cols, out_dir):
+def _plot_categorical_bars(df, cat_cols, out_dir, queue):
     imgs = []
     cols = cat_cols[:10]
     for c in cols:
         vc = df[c].value_counts(dropna=False).head(20)
-        plt.figure(figsize=(10,6))
-        sns.barplot(x=vc.values, y=vc.index, orient='h')
-        plt.title(f"Top categorias: {c}")
-        plt.xlabel("Frequência")
-        plt.ylabel(c)
-        plt.tight_layout()
         fn = os.path.join(out_dir, f"eda_bar_{c}.png")
-        plt.savefig(fn)
-        plt.close()
+        queue.append(figure_render.bar_spec(vc.index.astype(str), vc.values, fn, f"Top categorias: {c}", "Frequência", c,
+                                            horizontal=True, figsize=(10, 6)))
         imgs.append(fn)
     return imgs
 
-def _plot_corr_heatmap(df, num_cols, out_dir):
+def _plot_corr_heatmap(df, num_cols, out_dir, queue):
     if len(num_cols) < 2:
         return None
     corr = df[num_cols].apply(pd.to_numeric, errors='coerce').corr(method='pearson')
-    plt.figure(figsize=(max(8, len(num_cols)), max(6, len(num_cols))))
-    sns.heatmap(corr, annot=False, cmap='viridis')
-    plt.title("Matriz de correlação (Pearson)")
-    plt.tight_layout()
     fn = os.path.join(out_dir, "eda_corr_heatmap.png")
-    plt.savefig(fn)
-    plt.close()
+    queue.append(figure_render.heatmap_spec(corr.values, num_cols, fn, "Matriz de correlação (Pearson)",
+                                            figsize=(max(8, len(num_cols)), max(6, len(num_cols)))))
     return fn
 
 def _format_pct(x):
@@ -308,9 +294,11 @@ def generate_eda_report(file_path, output_dir):
     outliers = _detect_outliers_iqr(df, num_cols)
     dup = _duplicate_analysis(df)
     examples_missing, examples_outliers = _example_problematic_rows(df)
-    num_imgs = _plot_numeric_histograms(df, num_cols, output_dir)
-    cat_imgs = _plot_categorical_bars(df, cat_cols, output_dir)
-    corr_img = _plot_corr_heatmap(df, num_cols, output_dir)
+    figures = []
+    num_imgs = _plot_numeric_histograms(df, num_cols, output_dir, figures)
+    cat_imgs = _plot_categorical_bars(df, cat_cols, output_dir, figures)
+    corr_img = _plot_corr_heatmap(df, num_cols, output_dir, figures)
+    figure_render.render(figures)
     md_path = os.path.join(os.path.dirname(output_dir), 'eda_report.md')
     _write_report(
         md_path,
@@ -8,22 +8,50 @@ Etapas da análise:
 4) Métricas de operação: fator de carga diário e relação pico vs média
 5) Modelagem básica: baseline lag-1 e regressão linear com features simples
 6) Relato: consolidação das evidências e métricas em `reports/mvp_report.md`
+7) Modo multi-zona (`MVP_ZONES=all` ou lista): passos 5–6 para cada zona do catálogo em paralelo
+8) Modo multi-horizonte (`MVP_HORIZONS=48`): previsão direta de 1 a H horas à frente
 """
 
 import os
+import json
 import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from pandas.tseries.holiday import USFederalHolidayCalendar
+try:
+    from src import calendar_features
+    from src import figure_render
+    from src import residual_analytics
+except ImportError:
+    import calendar_features
+    import figure_render
+    import residual_analytics
+
+# Esquema compacto das colunas de calendário produzidas por `add_time_features`
+COMPACT_SCHEMA = {
+    'hora': 'int8',
+    'dia_semana': 'int8',
+    'mes': 'int8',
+    'ano': 'int16',
+    'estacao': 'category',
+    'fim_semana': 'bool',
+    'dia_util': 'bool',
+    'feriado': 'bool',
+}
+
+# Mínimo de linhas para um ano servir de teste (4 semanas); anos parciais na
+# borda da série (ex.: uma única hora em NI 2011 ou PJM_Load 2002) são ignorados
+MIN_TEST_ROWS = 24 * 28
+
 
 def load_series(path, value_col, agg='mean'):
     """
     Leitura e preparação de uma série horária:
     - Lê CSV em `path`
     - Converte `Datetime` para datetime e ordena temporalmente
-    - Garante tipo numérico para `value_col`
+    - Garante tipo numérico (float32) para `value_col`
     - Agrega duplicidades por `Datetime` usando `agg` (mean, max, etc.)
     - Retorna DataFrame pronto para análise
     """
@@ -31,37 +59,62 @@ def load_series(path, value_col, agg='mean'):
     df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
     df = df.dropna(subset=['Datetime'])
     df = df.sort_values('Datetime')
-    df[value_col] = pd.to_numeric(df[value_col], errors='coerce')
+    df[value_col] = pd.to_numeric(df[value_col], errors='coerce').astype(np.float32)
     if df['Datetime'].duplicated().any():
         df = df.groupby('Datetime', as_index=False)[value_col].agg(agg)
     return df
 
 
+def load_series_matrix(base, zone, value_col):
+    """
+    Leitura de uma zona a partir da matriz memmap (`src/zone_matrix.py`):
+    - Eixo horário contínuo; horas ausentes ficam como NaN
+    - A coluna de valores é uma fatia (view) do memmap, sem cópia
+    """
+    try:
+        from src import zone_matrix
+    except ImportError:
+        import zone_matrix
+    m = zone_matrix.open_zone_matrix(base)
+    return zone_matrix.zone_frame(m, zone, value_col)
+
+
 def add_time_features(df):
     """
     Enriquecimento temporal:
     - Extrai `hora`, `dia_semana`, `mes`, `ano`
-    - Define `estacao` (inverno, primavera, verao, outono) com base no mês
+    - Define `estacao` (categórica: inverno, primavera, verao, outono) com base no mês
     - Adiciona flags `fim_semana` e `dia_util`
+    - Colunas vêm do feature store de calendário (`src/calendar_features.py`), calculadas uma vez por índice
     - Retorna DataFrame com features adicionadas
     """
-    df['hora'] = df['Datetime'].dt.hour
-    df['dia_semana'] = df['Datetime'].dt.dayofweek
-    df['mes'] = df['Datetime'].dt.month
-    df['ano'] = df['Datetime'].dt.year
-    m = df['mes']
-    season = np.where(m.isin([12,1,2]), 'inverno',
-             np.where(m.isin([3,4,5]), 'primavera',
-             np.where(m.isin([6,7,8]), 'verao', 'outono')))
-    df['estacao'] = season
-    df['fim_semana'] = df['dia_semana'].isin([5,6])
-    df['dia_util'] = ~df['fim_semana']
-    cal = USFederalHolidayCalendar()
-    hdays = cal.holidays(start=str(df['Datetime'].min().date()), end=str(df['Datetime'].max().date()))
-    df['feriado'] = df['Datetime'].dt.normalize().isin(hdays)
+    cal = calendar_features.calendar_arrays(df['Datetime'])
+    df['hora'] = cal['hour']
+    df['dia_semana'] = cal['dayofweek']
+    df['mes'] = cal['month']
+    df['ano'] = cal['year']
+    df['estacao'] = calendar_features.season_names(cal['season'])
+    df['fim_semana'] = cal['weekend']
+    df['dia_util'] = cal['weekday']
+    df['feriado'] = cal['holiday']
+    check_compact_schema(df)
     return df
 
 
+def check_compact_schema(df, value_col=None):
+    """
+    Guarda do esquema compacto no caminho quente:
+    - Falha (TypeError) se houver coluna `object` ou se uma coluna de `COMPACT_SCHEMA` mudar de dtype
+    - Se `value_col` for informado, exige carga em float32
+    """
+    bad = [c for c in df.columns if df[c].dtype == object]
+    bad += [c for c, t in COMPACT_SCHEMA.items() if c in df.columns and str(df[c].dtype) != t and c not in bad]
+    if value_col is not None and df[value_col].dtype != np.float32:
+        bad.append(value_col)
+    if bad:
+        raise TypeError(f"Colunas fora do esquema compacto: {', '.join(f'{c} ({df[c].dtype})' for c in bad)}")
+
+
 def ensure_dir(d):
     """
     Cria diretório `d` se não existir
@@ -69,23 +122,30 @@ def ensure_dir(d):
     os.makedirs(d, exist_ok=True)
 
 
-def plot_histogram(df, value_col, out_path, show=False):
+def emit_figure(spec, queue=None, show=False):
+    """
+    Destino de uma figura (`figure_render`):
+    - Com `queue`, apenas enfileira a especificação para renderização em lote
+    - Sem fila, renderiza na hora (e abre a janela se `show`)
+    """
+    if queue is not None and not show:
+        queue.append(spec)
+    elif show:
+        figure_render.show(spec)
+    else:
+        figure_render.render([spec], workers=1)
+
+
+def plot_histogram(df, value_col, out_path, show=False, queue=None):
     """
     Histograma com KDE para coluna numérica:
     - Salva figura em `out_path`
+    - KDE calculado sobre dados binados (sem passar os pontos brutos ao renderizador)
     """
-    plt.figure(figsize=(8,5))
-    sns.histplot(df[value_col].dropna(), bins=40, kde=True)
-    plt.title(f"Histograma {value_col}")
-    plt.xlabel(value_col)
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
+    emit_figure(figure_render.hist_spec(df[value_col], out_path, f"Histograma {value_col}", value_col, bins=40), queue, show)
 
 
-def hourly_curve_year(df, value_col, year, out_path, show=False):
+def hourly_curve_year(df, value_col, year, out_path, show=False, queue=None):
     """
     Curva média por hora para um `year` específico:
     - Agrupa por `hora` e calcula média de `value_col`
@@ -93,36 +153,20 @@ def hourly_curve_year(df, value_col, year, out_path, show=False):
     """
     d = df[df['ano'] == year]
     g = d.groupby('hora')[value_col].mean()
-    plt.figure(figsize=(9,5))
-    sns.lineplot(x=g.index, y=g.values)
-    plt.title(f"Curva média por hora ({value_col}) em {year}")
-    plt.xlabel("Hora do dia")
-    plt.ylabel("MW médio")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
+    emit_figure(figure_render.lines_spec([(None, g.index, g.values)], out_path, f"Curva média por hora ({value_col}) em {year}",
+                                         "Hora do dia", "MW médio"), queue, show)
     return g
 
 
-def dow_curve(df, value_col, out_path, show=False):
+def dow_curve(df, value_col, out_path, show=False, queue=None):
     """
     Curva média por dia da semana:
     - Agrupa por `dia_semana` e calcula média de `value_col`
     - Gera figura e retorna a série agregada
     """
     g = df.groupby('dia_semana')[value_col].mean()
-    plt.figure(figsize=(9,5))
-    sns.lineplot(x=g.index, y=g.values)
-    plt.title(f"Curva média por dia da semana ({value_col})")
-    plt.xlabel("Dia da semana (0=Seg)")
-    plt.ylabel("MW médio")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
+    emit_figure(figure_render.lines_spec([(None, g.index, g.values)], out_path, f"Curva média por dia da semana ({value_col})",
+                                         "Dia da semana (0=Seg)", "MW médio"), queue, show)
     return g
 
 
@@ -132,7 +176,7 @@ def seasonal_hourly_diff(df, value_col):
     - Calcula média por (`estacao`, `hora`)
     - Retorna top-3 de verão e de inverno
     """
-    g = df.groupby(['estacao','hora'])[value_col].mean().reset_index()
+    g = df.groupby(['estacao','hora'], observed=True)[value_col].mean().reset_index()
     verao = g[g['estacao']=='verao']
     inverno = g[g['estacao']=='inverno']
     if not verao.empty and not inverno.empty:
@@ -160,21 +204,22 @@ def daily_load_factor(df, value_col):
     return out
 
 
-def plot_peak_vs_mean(daily_df, out_path, show=False):
+def plot_peak_vs_mean(daily_df, out_path, show=False, queue=None):
     """
     Dispersão entre média diária e pico diário:
     - Ajuda a visualizar correlação e dispersão de operação
     """
-    plt.figure(figsize=(7,6))
-    sns.scatterplot(x=daily_df['media'], y=daily_df['pico'])
-    plt.title("Relação pico diário vs média diária")
-    plt.xlabel("Média (MW)")
-    plt.ylabel("Pico (MW)")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
+    emit_figure(figure_render.scatter_spec(daily_df['media'], daily_df['pico'], out_path, "Relação pico diário vs média diária",
+                                           "Média (MW)", "Pico (MW)"), queue, show)
+
+
+def _lagged(v, k):
+    """
+    Desloca o vetor `v` em `k` posições (equivalente a `shift(k)`), preenchendo com NaN
+    """
+    out = np.full(v.shape[0], np.nan)
+    out[k:] = v[:len(v) - k]
+    return out
 
 
 def build_features(df, value_col):
@@ -183,17 +228,14 @@ def build_features(df, value_col):
     - Adiciona lags (1h, 24h) e calendário (hora, dia, mês)
     - Monta matriz X com termo de intercepto e vetor y
     - Retorna índice temporal, X e y alinhados
+    - Trabalha sobre os arrays das colunas (sem copiar `df`), aceitando fatias de memmap
+    - Consome o esquema compacto (int8/float32); X sai em float64 para a solução dos mínimos quadrados
     """
-    df = df.copy()
-    df['lag1'] = df[value_col].shift(1)
-    df['lag24'] = df[value_col].shift(24)
-    X = df[['hora','dia_semana','mes','lag1','lag24']]
-    y = df[value_col]
-    m = pd.concat([df[['Datetime']], X, y], axis=1).dropna()
-    X = m[['hora','dia_semana','mes','lag1','lag24']].values.astype(float)
-    y = m[value_col].values.astype(float)
-    X = np.concatenate([np.ones((X.shape[0],1)), X], axis=1)
-    return m[['Datetime']], X, y
+    check_compact_schema(df, value_col)
+    v = df[value_col].to_numpy(dtype=float)
+    X = np.column_stack([np.ones(len(v)), df['hora'], df['dia_semana'], df['mes'], _lagged(v, 1), _lagged(v, 24)])
+    m = np.isfinite(X).all(axis=1) & np.isfinite(v) & df['Datetime'].notna().values
+    return df.loc[m, ['Datetime']], X[m], v[m]
 
 
 def build_features_weekend(df, value_col):
@@ -201,31 +243,36 @@ def build_features_weekend(df, value_col):
     Versão estendida de features:
     - Inclui `fim_semana` e `feriado` como flags adicionais
     """
-    df = df.copy()
-    df['lag1'] = df[value_col].shift(1)
-    df['lag24'] = df[value_col].shift(24)
-    df['fim_semana_flag'] = df['fim_semana'].astype(int)
-    df['feriado_flag'] = df.get('feriado', False)
-    df['feriado_flag'] = df['feriado_flag'].astype(int)
-    X = df[['hora','dia_semana','mes','lag1','lag24','fim_semana_flag','feriado_flag']]
-    y = df[value_col]
-    m = pd.concat([df[['Datetime']], X, y], axis=1).dropna()
-    X = m[['hora','dia_semana','mes','lag1','lag24','fim_semana_flag','feriado_flag']].values.astype(float)
-    y = m[value_col].values.astype(float)
-    X = np.concatenate([np.ones((X.shape[0],1)), X], axis=1)
-    return m[['Datetime']], X, y
+    check_compact_schema(df, value_col)
+    v = df[value_col].to_numpy(dtype=float)
+    fer = df['feriado'] if 'feriado' in df.columns else np.zeros(len(v))
+    X = np.column_stack([np.ones(len(v)), df['hora'], df['dia_semana'], df['mes'], _lagged(v, 1), _lagged(v, 24),
+                         np.asarray(df['fim_semana'], dtype=int), np.asarray(fer, dtype=int)])
+    m = np.isfinite(X).all(axis=1) & np.isfinite(v) & df['Datetime'].notna().values
+    return df.loc[m, ['Datetime']], X[m], v[m]
+
+
+def last_full_year(years):
+    """
+    Último ano com pelo menos `MIN_TEST_ROWS` linhas (None se nenhum)
+    """
+    counts = pd.Series(years).value_counts()
+    ok = counts.index[counts.values >= MIN_TEST_ROWS]
+    return int(ok.max()) if len(ok) else None
 
 
 def split_train_test(df_time, X, y):
     """
-    Split temporal por último ano:
-    - Treino: anos anteriores ao último
-    - Teste: último ano
-    - Retorna último ano e conjuntos de treino/teste
+    Split temporal por último ano completo:
+    - Teste: último ano com pelo menos `MIN_TEST_ROWS` linhas (`last_full_year`)
+    - Treino: anos anteriores a ele (horas após o ano de teste ficam de fora)
+    - Retorna ano de teste e conjuntos de treino/teste; ano None se a série for curta demais
     """
     years = df_time['Datetime'].dt.year
-    last_year = int(years.max())
-    train_idx = years != last_year
+    last_year = last_full_year(years.values)
+    if last_year is None:
+        return None, X[:0], y[:0], X[:0], y[:0]
+    train_idx = years < last_year
     test_idx = years == last_year
     X_train = X[train_idx.values]
     y_train = y[train_idx.values]
@@ -234,48 +281,85 @@ def split_train_test(df_time, X, y):
     return last_year, X_train, y_train, X_test, y_test
 
 
-def time_series_cv(df_time, X, y, n_splits=3, mode='expanding'):
+def year_sufficient_stats(df_time, X, y):
+    """
+    Estatísticas suficientes por ano (uma única passagem pelos dados):
+    - Para cada ano: XᵀX, Xᵀy, yᵀy e número de linhas
+    - Cada fold da validação temporal é obtido somando blocos, sem reprocessar X
+    """
+    years = calendar_features.calendar_arrays(df_time['Datetime'])['year']
+    stats = {}
+    for yr in np.unique(years):
+        m = years == yr
+        Xk, yk = X[m], y[m]
+        stats[int(yr)] = {'xtx': Xk.T @ Xk, 'xty': Xk.T @ yk, 'yty': float(yk @ yk), 'n': int(m.sum()), 'mask': m}
+    return stats
+
+
+def time_series_cv(df_time, X, y, n_splits=3, mode='expanding', stats=None):
     """
     Validação temporal com janelas:
     - `expanding`: treina em anos até k-1 e testa em ano k
     - `rolling`: treina só no ano k-1 e testa em ano k
+    - Treino a partir de `stats` (`year_sufficient_stats`): custo O(p²) por fold; só o ano de teste é percorrido
+    - Anos com menos de `MIN_TEST_ROWS` linhas não viram ano de teste
     - Retorna lista de dicts com ano de teste e métricas MAE/RMSE
     """
-    yrs = sorted(df_time['Datetime'].dt.year.unique())
+    if stats is None:
+        stats = year_sufficient_stats(df_time, X, y)
+    yrs = sorted(stats)
     if len(yrs) < 2:
         return []
     splits = []
-    end = len(yrs)
-    start = max(1, end - n_splits)
-    for i in range(start, end):
+    folds = [i for i in range(1, len(yrs)) if stats[yrs[i]]['n'] >= MIN_TEST_ROWS][-n_splits:]
+    for i in folds:
         test_year = yrs[i]
         if mode == 'expanding':
             train_years = yrs[:i]
         else:
             train_years = [yrs[i-1]]
-        tr_mask = df_time['Datetime'].dt.year.isin(train_years).values
-        te_mask = (df_time['Datetime'].dt.year == test_year).values
-        X_tr, y_tr = X[tr_mask], y[tr_mask]
+        te_mask = stats[test_year]['mask']
         X_te, y_te = X[te_mask], y[te_mask]
-        if len(y_tr) == 0 or len(y_te) == 0:
+        if sum(stats[k]['n'] for k in train_years) == 0 or len(y_te) == 0:
             continue
-        beta = fit_linear_regression(X_tr, y_tr)
+        xtx = sum(stats[k]['xtx'] for k in train_years)
+        xty = sum(stats[k]['xty'] for k in train_years)
+        beta = solve_normal_equations(xtx, xty)
         y_hat = predict_linear_regression(X_te, beta)
         mae, rmse = metrics(y_te, y_hat)
         splits.append({'test_year': int(test_year), 'mae': float(mae), 'rmse': float(rmse)})
     return splits
 
 
+def solve_normal_equations(XtX, Xty, max_cond=1e10):
+    """
+    Resolve (XᵀX) β = Xᵀy:
+    - Equilibra pela diagonal (colunas em escalas muito diferentes: intercepto vs lags em MW)
+    - Cholesky no sistema equilibrado; pseudo-inversa se não for definido positivo
+      ou se o número de condição passar de `max_cond`
+    - `Xty` pode ser matriz (um lado direito por coluna, ex.: um por horizonte)
+    """
+    d = np.sqrt(np.diag(XtX))
+    d = np.where(d > 0, d, 1.0)
+    dd = d.reshape(-1, *([1] * (np.ndim(Xty) - 1)))
+    S = XtX / np.outer(d, d)
+    b = Xty / dd
+    if np.linalg.cond(S) <= max_cond:
+        try:
+            L = np.linalg.cholesky(S)
+            return np.linalg.solve(L.T, np.linalg.solve(L, b)) / dd
+        except np.linalg.LinAlgError:
+            pass
+    return np.linalg.pinv(XtX) @ Xty
+
+
 def fit_linear_regression(X, y):
     """
     Regressão linear via solução de mínimos quadrados:
-    - Usa pseudo-inversa de X^T X
+    - Equações normais resolvidas por `solve_normal_equations` (Cholesky, pinv como fallback)
     - Retorna vetor de coeficientes
     """
-    XtX = X.T @ X
-    Xty = X.T @ y
-    beta = np.linalg.pinv(XtX) @ Xty
-    return beta
+    return solve_normal_equations(X.T @ X, X.T @ y)
 
 
 def predict_linear_regression(X, beta):
@@ -314,109 +398,65 @@ def baseline_prev(df, value_col):
     return mae, rmse
 
 
-def plot_residuals(y_true, y_pred, df_time, out_hist_path, out_hour_path, show=False):
+def residual_breakdown(y_true_v1, y_pred_v1, df_time_v1, y_true_v2, y_pred_v2, df_time_v2):
+    """
+    Quebras de erro dos dois modelos em uma única passada (`residual_analytics`):
+    - Por hora, dia da semana, mês, feriado e feriado × hora
+    - Consumidas por todas as figuras e tabelas de resíduos
+    """
+    res1 = y_true_v1 - y_pred_v1
+    res2 = y_true_v2 - y_pred_v2
+    return residual_analytics.error_breakdown({
+        'v1': (df_time_v1['Datetime'].values[-len(res1):], res1),
+        'v2': (df_time_v2['Datetime'].values[-len(res2):], res2),
+    })
+
+
+def plot_residuals(res, breakdown, model, out_hist_path, out_hour_path, show=False, queue=None):
     """
     Visualização de resíduos:
     - Histograma de resíduos
     - Erro absoluto médio por hora do dia
     """
-    res = y_true - y_pred
-    plt.figure(figsize=(8,5))
-    sns.histplot(res, bins=40, kde=True)
-    plt.title("Histograma de resíduos (teste)")
-    plt.xlabel("Resíduo (MW)")
-    plt.tight_layout()
-    plt.savefig(out_hist_path)
-    if show:
-        plt.show()
-    plt.close()
-    d = pd.DataFrame({'Datetime': df_time['Datetime'].values[-len(res):], 'res': res})
-    d['hora'] = pd.to_datetime(d['Datetime']).dt.hour
-    g = d.groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s)))
-    plt.figure(figsize=(9,5))
-    sns.lineplot(x=g.index, y=g.values)
-    plt.title("Erro absoluto médio por hora (teste)")
-    plt.xlabel("Hora do dia")
-    plt.ylabel("Erro absoluto médio (MW)")
-    plt.tight_layout()
-    plt.savefig(out_hour_path)
-    if show:
-        plt.show()
-    plt.close()
-
-
-def plot_residuals_holiday_comparison(y_true, y_pred, df_time_with_flags, out_path, show=False):
+    emit_figure(figure_render.hist_spec(res, out_hist_path, "Histograma de resíduos (teste)", "Resíduo (MW)", bins=40), queue, show)
+    g = breakdown['hora'][f'mae_{model}']
+    emit_figure(figure_render.lines_spec([(None, g.index, g.values)], out_hour_path, "Erro absoluto médio por hora (teste)",
+                                         "Hora do dia", "Erro absoluto médio (MW)"), queue, show)
+
+
+def plot_residuals_holiday_comparison(breakdown, model, out_path, show=False, queue=None):
     """
     Comparação de erro por hora entre feriado e não feriado:
     - Plota duas curvas (feriado vs não feriado) de erro absoluto médio por hora
-    """
-    res = y_true - y_pred
-    d = pd.DataFrame({'Datetime': df_time_with_flags['Datetime'].values[-len(res):], 'res': res})
-    d = pd.merge(d, df_time_with_flags[['Datetime', 'feriado']], on='Datetime', how='left')
-    d['hora'] = pd.to_datetime(d['Datetime']).dt.hour
-    g_h = d[d['feriado'] == True].groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s)))
-    g_nh = d[d['feriado'] != True].groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s)))
-    plt.figure(figsize=(9,5))
-    sns.lineplot(x=g_h.index, y=g_h.values, label='Feriado')
-    sns.lineplot(x=g_nh.index, y=g_nh.values, label='Não feriado')
-    plt.title("Erro absoluto médio por hora — feriado vs não feriado (teste)")
-    plt.xlabel("Hora do dia")
-    plt.ylabel("Erro absoluto médio (MW)")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
-
-def plot_residuals_model_compare(y_true_v1, y_pred_v1, df_time_v1, y_true_v2, y_pred_v2, df_time_v2, out_path, show=False):
-    res1 = y_true_v1 - y_pred_v1
-    d1 = pd.DataFrame({'Datetime': df_time_v1['Datetime'].values[-len(res1):], 'res': res1})
-    d1['hora'] = pd.to_datetime(d1['Datetime']).dt.hour
-    g1 = d1.groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s)))
-    res2 = y_true_v2 - y_pred_v2
-    d2 = pd.DataFrame({'Datetime': df_time_v2['Datetime'].values[-len(res2):], 'res': res2})
-    d2['hora'] = pd.to_datetime(d2['Datetime']).dt.hour
-    g2 = d2.groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s)))
-    plt.figure(figsize=(9,5))
-    sns.lineplot(x=g1.index, y=g1.values, label='Linear v1')
-    sns.lineplot(x=g2.index, y=g2.values, label='Linear v2')
-    plt.title("Erro absoluto médio por hora — comparação de modelos (teste)")
-    plt.xlabel("Hora do dia")
-    plt.ylabel("Erro absoluto médio (MW)")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
-
-def hourly_error_table(y_true_v1, y_pred_v1, df_time_v1, y_true_v2, y_pred_v2, df_time_v2, top_n=5):
-    res1 = y_true_v1 - y_pred_v1
-    d1 = pd.DataFrame({'Datetime': df_time_v1['Datetime'].values[-len(res1):], 'res': res1})
-    d1['hora'] = pd.to_datetime(d1['Datetime']).dt.hour
-    g1 = d1.groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s))).rename('mae_v1')
-    res2 = y_true_v2 - y_pred_v2
-    d2 = pd.DataFrame({'Datetime': df_time_v2['Datetime'].values[-len(res2):], 'res': res2})
-    d2['hora'] = pd.to_datetime(d2['Datetime']).dt.hour
-    g2 = d2.groupby('hora')['res'].apply(lambda s: np.mean(np.abs(s))).rename('mae_v2')
-    t = pd.concat([g1, g2], axis=1)
+    - Sem feriados (ou sem dias úteis) no teste, a curva correspondente fica vazia
+    """
+    full = pd.MultiIndex.from_product([range(residual_analytics.KEYS[k]) for k in ('feriado', 'hora')],
+                                      names=['feriado', 'hora'])
+    t = breakdown['feriado_hora'][f'mae_{model}'].reindex(full)
+    g_h = t.xs(1, level='feriado').dropna()
+    g_nh = t.xs(0, level='feriado').dropna()
+    emit_figure(figure_render.lines_spec([('Feriado', g_h.index, g_h.values), ('Não feriado', g_nh.index, g_nh.values)], out_path,
+                                         "Erro absoluto médio por hora — feriado vs não feriado (teste)",
+                                         "Hora do dia", "Erro absoluto médio (MW)"), queue, show)
+
+def plot_residuals_model_compare(breakdown, out_path, show=False, queue=None):
+    g = breakdown['hora']
+    emit_figure(figure_render.lines_spec([('Linear v1', g.index, g['mae_v1'].values), ('Linear v2', g.index, g['mae_v2'].values)], out_path,
+                                         "Erro absoluto médio por hora — comparação de modelos (teste)",
+                                         "Hora do dia", "Erro absoluto médio (MW)"), queue, show)
+
+def hourly_error_table(breakdown, top_n=5):
+    t = breakdown['hora'][['mae_v1', 'mae_v2']].copy()
     t['improvement'] = t['mae_v1'] - t['mae_v2']
-    t = t.reset_index().rename(columns={'index':'hora'})
+    t = t.reset_index()
     t = t.sort_values('improvement', ascending=False)
     return t.head(top_n), t
 
-def plot_hourly_improvement_bar(hourly_df, out_path, show=False):
+def plot_hourly_improvement_bar(hourly_df, out_path, show=False, queue=None):
     d = hourly_df.sort_values('hora').copy()
     cols = ['#d62728' if v < 0 else '#2ca02c' for v in d['improvement']]
-    plt.figure(figsize=(10,5))
-    plt.bar(d['hora'], d['improvement'], color=cols)
-    plt.title("Ganho por hora (MAE_v1 − MAE_v2)")
-    plt.xlabel("Hora do dia")
-    plt.ylabel("Ganho de MAE (positivo = v2 melhor)")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    if show:
-        plt.show()
-    plt.close()
+    emit_figure(figure_render.bar_spec(d['hora'], d['improvement'], out_path, "Ganho por hora (MAE_v1 − MAE_v2)",
+                                       "Hora do dia", "Ganho de MAE (positivo = v2 melhor)", colors=cols), queue, show)
 
 
 def write_report(path, context, aep_hist, pjm_hist, aep_hour_curve, pjm_hour_curve, aep_dow_curve, pjm_dow_curve, lf_table_path, lf_worst, peak_mean_plot, base_mae, base_rmse, lin_mae, lin_rmse, last_year, verao_top, inverno_top, cv_exp=None, cv_roll=None, resid_hist=None, resid_hour=None, lin2_mae=None, lin2_rmse=None, cv_exp2=None, cv_roll2=None, resid_hist2=None, resid_hour2=None, model_cmp_fig=None, hourly_cmp_top=None, hourly_cmp_csv=None, hourly_cmp_worst=None, improvement_fig=None):
@@ -550,6 +590,180 @@ def write_report(path, context, aep_hist, pjm_hist, aep_hour_curve, pjm_hour_cur
         f.write("\n".join(lines))
 
 
+def hourly_grid(df, value_col):
+    """
+    Série em grade horária contínua:
+    - Horas ausentes viram NaN, para que janelas posicionais correspondam a horas reais
+    - Retorna (horas desde a época, valores float64)
+    """
+    h = df['Datetime'].values.astype('datetime64[h]').astype(np.int64)
+    v = df[value_col].to_numpy(dtype=float)
+    full = np.full(int(h.max() - h.min()) + 1, np.nan)
+    full[h - h.min()] = v
+    return h.min() + np.arange(len(full)), full
+
+
+def build_multi_horizon(df, value_col, horizons=48, n_lags=24):
+    """
+    Matrizes para previsão direta multi-horizonte:
+    - Uma única janela deslizante (`sliding_window_view`) de tamanho n_lags + horizons sobre a grade horária
+    - X (compartilhado): intercepto, hora da origem (dummies), fim de semana e os últimos `n_lags` valores
+    - Y: uma coluna por horizonte (t+1 … t+H), sem cópias por `shift`
+    - Retorna horas de origem, X, Y e a janela de lags (para baselines)
+    """
+    hours, v = hourly_grid(df, value_col)
+    W = sliding_window_view(v, n_lags + horizons)
+    origin = hours[n_lags - 1:n_lags - 1 + len(W)]
+    ok = np.isfinite(W).all(axis=1)
+    W, origin = W[ok], origin[ok]
+    lags, Y = W[:, :n_lags], W[:, n_lags:]
+    hod = (origin % 24).astype(np.int64)
+    weekend = ((origin // 24 + 3) % 7 >= 5).astype(float)
+    X = np.empty((len(W), 1 + 23 + 1 + n_lags))
+    X[:, 0] = 1.0
+    X[:, 1:24] = hod[:, None] == np.arange(1, 24)[None, :]
+    X[:, 24] = weekend
+    X[:, 25:] = lags
+    return origin, X, Y, lags
+
+
+def multi_horizon_forecast(df, value_col, horizons=48, n_lags=24):
+    """
+    Previsão direta de 1 a `horizons` horas:
+    - Treino: origens antes do último ano completo; teste: origens nesse ano (`last_full_year`)
+    - Todos os horizontes em um único solve (XᵀX β = XᵀY, um lado direito por horizonte)
+    - Retorna tabela com MAE/RMSE por horizonte e baselines (persistência e sazonal 24h)
+    """
+    origin, X, Y, lags = build_multi_horizon(df, value_col, horizons, n_lags)
+    year = origin.astype('datetime64[h]').astype('datetime64[Y]').astype(np.int64) + 1970
+    last_year = last_full_year(year)
+    if last_year is None:
+        raise ValueError(f'Série curta demais: nenhum ano com {MIN_TEST_ROWS} origens')
+    tr, te = year < last_year, year == last_year
+    beta = solve_normal_equations(X[tr].T @ X[tr], X[tr].T @ Y[tr])
+    err = Y[te] - X[te] @ beta
+    h = np.arange(1, horizons + 1)
+    persist = Y[te] - lags[te][:, -1:]
+    seasonal_pos = n_lags - 1 + h - 24 * np.ceil(h / 24).astype(int)
+    seasonal = np.where(seasonal_pos >= 0, Y[te] - lags[te][:, np.clip(seasonal_pos, 0, n_lags - 1)], np.nan)
+    return pd.DataFrame({
+        'horizonte_h': h,
+        'mae': np.mean(np.abs(err), axis=0),
+        'rmse': np.sqrt(np.mean(err**2, axis=0)),
+        'mae_persistencia': np.mean(np.abs(persist), axis=0),
+        'mae_sazonal_24h': np.mean(np.abs(seasonal), axis=0),
+        'n_teste': int(te.sum()),
+        'ano_teste': last_year,
+    })
+
+
+def evaluate_zone(base, zone, path):
+    """
+    Avaliação completa de uma zona (executada em processo separado no modo multi-zona):
+    - Baseline lag-1, Linear v1/v2 no último ano e CV expanding/rolling
+    - Grava artefatos em `reports/zones/<zona>/` (métricas, erro por hora e figura v1 vs v2)
+    - Retorna apenas um dict de métricas, sem DataFrames, para não serializar dados entre processos
+    - Zona sem ano com `MIN_TEST_ROWS` linhas é marcada em `skipped` e não é avaliada
+    """
+    t0 = time.perf_counter()
+    value_col = f'{zone}_MW'
+    out = os.path.join(base, 'reports', 'zones', zone)
+    ensure_dir(out)
+    df = add_time_features(load_series(path, value_col))
+    df_time, X, y = build_features(df, value_col)
+    ly, X_train, y_train, X_test, y_test = split_train_test(df_time, X, y)
+    if ly is None:
+        return {'zone': zone, 'rows': int(len(df)), 'skipped': f'nenhum ano com {MIN_TEST_ROWS} linhas de teste',
+                'seconds': time.perf_counter() - t0}
+    base_mae, base_rmse = baseline_prev(df[df['ano'] == ly][['Datetime', value_col]], value_col)
+    y_pred = predict_linear_regression(X_test, fit_linear_regression(X_train, y_train))
+    lin_mae, lin_rmse = metrics(y_test, y_pred)
+    df_time2, X2, y2 = build_features_weekend(df, value_col)
+    ly2, X_train2, y_train2, X_test2, y_test2 = split_train_test(df_time2, X2, y2)
+    y_pred2 = predict_linear_regression(X_test2, fit_linear_regression(X_train2, y_train2))
+    lin2_mae, lin2_rmse = metrics(y_test2, y_pred2)
+    st, st2 = year_sufficient_stats(df_time, X, y), year_sufficient_stats(df_time2, X2, y2)
+    cv = {
+        'cv_exp': time_series_cv(df_time, X, y, n_splits=3, mode='expanding', stats=st),
+        'cv_roll': time_series_cv(df_time, X, y, n_splits=3, mode='rolling', stats=st),
+        'cv_exp2': time_series_cv(df_time2, X2, y2, n_splits=3, mode='expanding', stats=st2),
+        'cv_roll2': time_series_cv(df_time2, X2, y2, n_splits=3, mode='rolling', stats=st2),
+    }
+    df_test = df_time[(df_time['Datetime'].dt.year == ly).values]
+    df_test2 = df_time2[(df_time2['Datetime'].dt.year == ly2).values]
+    breakdown = residual_breakdown(y_test, y_pred, df_test, y_test2, y_pred2, df_test2)
+    _, hourly = hourly_error_table(breakdown)
+    hourly.to_csv(os.path.join(out, 'hourly_error_compare.csv'), index=False)
+    residual_analytics.tidy(breakdown).to_csv(os.path.join(out, 'residual_breakdown.csv'), index=False)
+    plot_residuals_model_compare(breakdown, os.path.join(out, 'resid_hour_model_compare.png'))
+    res = {
+        'zone': zone,
+        'rows': int(len(df)),
+        'test_year': int(ly),
+        'base_mae': base_mae, 'base_rmse': base_rmse,
+        'lin_mae': lin_mae, 'lin_rmse': lin_rmse,
+        'lin2_mae': lin2_mae, 'lin2_rmse': lin2_rmse,
+        'skipped': '',
+    }
+    for k, folds in cv.items():
+        res[f'{k}_mae'] = float(np.mean([f['mae'] for f in folds])) if folds else float('nan')
+    with open(os.path.join(out, 'metrics.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(res, **cv), f, indent=2)
+    res['seconds'] = time.perf_counter() - t0
+    return res
+
+
+def _evaluate_zone_args(args):
+    return evaluate_zone(*args)
+
+
+def run_zones(base, zones=None, workers=None):
+    """
+    Modo multi-zona:
+    - Lê as zonas de `data/catalog.yaml` (todas ou as listadas em `zones`)
+    - Avalia cada zona em um pool de processos (`workers`, padrão = nº de CPUs)
+    - Consolida a comparação em `reports/mvp_zones_summary.csv` e `reports/mvp_zones_report.md`
+    """
+    try:
+        from src import zone_matrix
+    except ImportError:
+        import zone_matrix
+    catalog = [(base, z, p) for z, p in zone_matrix.read_catalog(base) if os.path.exists(p) and (not zones or z in zones)]
+    if workers is None:
+        workers = min(len(catalog), os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    if workers > 1 and len(catalog) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_evaluate_zone_args, catalog))
+    else:
+        results = [evaluate_zone(*args) for args in catalog]
+    table = pd.DataFrame(results)
+    table['skipped'] = table['skipped'].fillna('')
+    table = table.sort_values([c for c in ['skipped', 'lin2_mae'] if c in table]).reset_index(drop=True)
+    table.to_csv(os.path.join(base, 'reports', 'mvp_zones_summary.csv'), index=False)
+    lines = []
+    lines.append("# MVP Analítico: Comparação entre zonas (PJM)")
+    lines.append("")
+    n_skipped = int((table['skipped'] != '').sum())
+    lines.append(f"Zonas avaliadas: {len(table) - n_skipped} | Puladas: {n_skipped} | Processos: {workers} | "
+                 f"Tempo total: {time.perf_counter() - t0:.1f}s")
+    lines.append("")
+    lines.append("| Zona | Ano teste | Baseline MAE | Linear v1 MAE | Linear v2 MAE | CV exp v1 | CV roll v1 | CV exp v2 | CV roll v2 |")
+    lines.append("|---|---:|---:|---:|---:|---:|---:|---:|---:|")
+    for _, r in table.iterrows():
+        if r['skipped']:
+            lines.append(f"| {r['zone']} | pulada: {r['skipped']} | | | | | | | |")
+            continue
+        lines.append(f"| {r['zone']} | {int(r['test_year'])} | {r['base_mae']:.2f} | {r['lin_mae']:.2f} | {r['lin2_mae']:.2f} | "
+                     f"{r['cv_exp_mae']:.2f} | {r['cv_roll_mae']:.2f} | {r['cv_exp2_mae']:.2f} | {r['cv_roll2_mae']:.2f} |")
+    lines.append("")
+    lines.append("Artefatos por zona em `reports/zones/<zona>/` (metrics.json, hourly_error_compare.csv, resid_hour_model_compare.png).")
+    report = os.path.join(base, 'reports', 'mvp_zones_report.md')
+    with open(report, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    return table, report
+
+
 def main():
     """
     Pipeline principal:
@@ -559,37 +773,63 @@ def main():
     4) Calcula fator de carga diário e pico vs média
     5) Treina baseline e regressão linear; calcula métricas
     6) Escreve relatório MVP e imprime caminho
+    - Com `MVP_ZONES` definido (`all` ou `AEP,DOM,...`), executa o modo multi-zona (`run_zones`);
+      `MVP_WORKERS` controla o número de processos
+    - Figuras são enfileiradas e renderizadas em lote por `figure_render` (pool de processos, `MVP_WORKERS`);
+      as que não mudaram de dados desde a última execução são puladas
+    - Com `MVP_HORIZONS=H`, gera MAE/RMSE por horizonte (1…H h) para AEP em `reports/mvp_multi_horizon_AEP.csv`
     """
     base = os.environ.get('DATA_ROOT', os.getcwd())
+    zones = os.environ.get('MVP_ZONES')
+    if zones:
+        workers = int(os.environ['MVP_WORKERS']) if os.environ.get('MVP_WORKERS') else None
+        table, report = run_zones(base, None if zones == 'all' else zones.split(','), workers)
+        print(table.to_string(index=False))
+        print(report)
+        return
+    horizons = os.environ.get('MVP_HORIZONS')
+    if horizons:
+        aep = add_time_features(load_series(os.path.join(base, 'data', 'raw', 'AEP_hourly.csv'), 'AEP_MW'))
+        table = multi_horizon_forecast(aep, 'AEP_MW', int(horizons))
+        path = os.path.join(base, 'reports', 'mvp_multi_horizon_AEP.csv')
+        table.to_csv(path, index=False)
+        print(table.to_string(index=False))
+        print(path)
+        return
     out = os.path.join(base, 'reports', 'figures')
     ensure_dir(out)
     show = (os.environ.get('SHOW_PLOTS', '0') == '1') or ('COLAB_RELEASE_TAG' in os.environ)
+    figures = []
     aep_col = 'AEP_MW'
     pjm_col = 'PJM_Load_MW'
-    aep = load_series(os.path.join(base, 'data', 'raw', 'AEP_hourly.csv'), aep_col)
-    pjm = load_series(os.path.join(base, 'data', 'raw', 'PJM_Load_hourly.csv'), pjm_col)
+    if os.environ.get('MVP_SOURCE', 'raw') == 'matrix':
+        aep = load_series_matrix(base, 'AEP', aep_col)
+        pjm = load_series_matrix(base, 'PJM_Load', pjm_col)
+    else:
+        aep = load_series(os.path.join(base, 'data', 'raw', 'AEP_hourly.csv'), aep_col)
+        pjm = load_series(os.path.join(base, 'data', 'raw', 'PJM_Load_hourly.csv'), pjm_col)
     aep = add_time_features(aep)
     pjm = add_time_features(pjm)
     aep_hist = os.path.join(out, 'mvp_hist_AEP.png')
     pjm_hist = os.path.join(out, 'mvp_hist_PJM_Load.png')
-    plot_histogram(aep, aep_col, aep_hist, show=show)
-    plot_histogram(pjm, pjm_col, pjm_hist, show=show)
+    plot_histogram(aep, aep_col, aep_hist, show=show, queue=figures)
+    plot_histogram(pjm, pjm_col, pjm_hist, show=show, queue=figures)
     last_year = int(aep['ano'].max())
     aep_hour_curve = os.path.join(out, f'mvp_hourcurve_AEP_{last_year}.png')
     pjm_hour_curve = os.path.join(out, f'mvp_hourcurve_PJM_Load_{last_year}.png')
-    hourly_curve_year(aep, aep_col, last_year, aep_hour_curve, show=show)
-    hourly_curve_year(pjm, pjm_col, last_year, pjm_hour_curve, show=show)
+    hourly_curve_year(aep, aep_col, last_year, aep_hour_curve, show=show, queue=figures)
+    hourly_curve_year(pjm, pjm_col, last_year, pjm_hour_curve, show=show, queue=figures)
     aep_dow_curve = os.path.join(out, 'mvp_dowcurve_AEP.png')
     pjm_dow_curve = os.path.join(out, 'mvp_dowcurve_PJM_Load.png')
-    dow_curve(aep, aep_col, aep_dow_curve, show=show)
-    dow_curve(pjm, pjm_col, pjm_dow_curve, show=show)
+    dow_curve(aep, aep_col, aep_dow_curve, show=show, queue=figures)
+    dow_curve(pjm, pjm_col, pjm_dow_curve, show=show, queue=figures)
     v_top, i_top = seasonal_hourly_diff(aep, aep_col)
     lf = daily_load_factor(aep, aep_col)
     lf_csv = os.path.join(base, 'reports', 'mvp_daily_load_factor_AEP.csv')
     lf.to_csv(lf_csv, index=False)
     lf_worst = lf.nsmallest(10, 'fator')
     peak_mean_plot = os.path.join(out, 'mvp_peak_vs_mean_AEP.png')
-    plot_peak_vs_mean(lf, peak_mean_plot, show=show)
+    plot_peak_vs_mean(lf, peak_mean_plot, show=show, queue=figures)
     df_time, X, y = build_features(aep, aep_col)
     ly, X_train, y_train, X_test, y_test = split_train_test(df_time, X, y)
     aep_subset = aep[aep['ano'] == ly][['Datetime', aep_col]]
@@ -597,36 +837,42 @@ def main():
     beta = fit_linear_regression(X_train, y_train)
     y_pred = predict_linear_regression(X_test, beta)
     lin_mae, lin_rmse = metrics(y_test, y_pred)
-    cv_exp = time_series_cv(df_time, X, y, n_splits=3, mode='expanding')
-    cv_roll = time_series_cv(df_time, X, y, n_splits=3, mode='rolling')
+    cv_stats = year_sufficient_stats(df_time, X, y)
+    cv_exp = time_series_cv(df_time, X, y, n_splits=3, mode='expanding', stats=cv_stats)
+    cv_roll = time_series_cv(df_time, X, y, n_splits=3, mode='rolling', stats=cv_stats)
     resid_hist = os.path.join(out, 'mvp_resid_hist_AEP.png')
     resid_hour = os.path.join(out, 'mvp_resid_hour_AEP.png')
     test_mask = (df_time['Datetime'].dt.year == ly).values
     df_time_test = df_time[test_mask]
-    plot_residuals(y_test, y_pred, df_time_test, resid_hist, resid_hour, show=show)
     df_time2, X2, y2 = build_features_weekend(aep, aep_col)
     ly2, X_train2, y_train2, X_test2, y_test2 = split_train_test(df_time2, X2, y2)
     beta2 = fit_linear_regression(X_train2, y_train2)
     y_pred2 = predict_linear_regression(X_test2, beta2)
     lin2_mae, lin2_rmse = metrics(y_test2, y_pred2)
-    cv_exp2 = time_series_cv(df_time2, X2, y2, n_splits=3, mode='expanding')
-    cv_roll2 = time_series_cv(df_time2, X2, y2, n_splits=3, mode='rolling')
+    cv_stats2 = year_sufficient_stats(df_time2, X2, y2)
+    cv_exp2 = time_series_cv(df_time2, X2, y2, n_splits=3, mode='expanding', stats=cv_stats2)
+    cv_roll2 = time_series_cv(df_time2, X2, y2, n_splits=3, mode='rolling', stats=cv_stats2)
     resid_hist2 = os.path.join(out, 'mvp_resid_hist_AEP_v2.png')
     resid_hour2 = os.path.join(out, 'mvp_resid_hour_AEP_v2.png')
     test_mask2 = (df_time2['Datetime'].dt.year == ly2).values
     df_time_test2 = df_time2[test_mask2]
-    plot_residuals(y_test2, y_pred2, df_time_test2, resid_hist2, resid_hour2, show=show)
-    df_time_test2_flags = pd.merge(df_time_test2, aep[['Datetime','feriado']], on='Datetime', how='left')
+    breakdown = residual_breakdown(y_test, y_pred, df_time_test, y_test2, y_pred2, df_time_test2)
+    plot_residuals(y_test - y_pred, breakdown, 'v1', resid_hist, resid_hour, show=show, queue=figures)
+    plot_residuals(y_test2 - y_pred2, breakdown, 'v2', resid_hist2, resid_hour2, show=show, queue=figures)
     resid_holi_cmp = os.path.join(out, 'mvp_resid_hour_holiday_AEP_v2.png')
-    plot_residuals_holiday_comparison(y_test2, y_pred2, df_time_test2_flags, resid_holi_cmp, show=show)
+    plot_residuals_holiday_comparison(breakdown, 'v2', resid_holi_cmp, show=show, queue=figures)
     resid_model_cmp = os.path.join(out, 'mvp_resid_hour_model_compare_AEP.png')
-    plot_residuals_model_compare(y_test, y_pred, df_time_test, y_test2, y_pred2, df_time_test2, resid_model_cmp, show=show)
-    hourly_top, hourly_full = hourly_error_table(y_test, y_pred, df_time_test, y_test2, y_pred2, df_time_test2)
+    plot_residuals_model_compare(breakdown, resid_model_cmp, show=show, queue=figures)
+    hourly_top, hourly_full = hourly_error_table(breakdown)
     hourly_csv = os.path.join(base, 'reports', 'mvp_hourly_error_compare_AEP.csv')
     hourly_full.to_csv(hourly_csv, index=False)
+    residual_analytics.tidy(breakdown).to_csv(os.path.join(base, 'reports', 'mvp_residual_breakdown_AEP.csv'), index=False)
     hourly_worst = hourly_full.sort_values('improvement', ascending=True).head(5)
     improvement_fig = os.path.join(out, 'mvp_hourly_improvement_AEP.png')
-    plot_hourly_improvement_bar(hourly_full, improvement_fig, show=show)
+    plot_hourly_improvement_bar(hourly_full, improvement_fig, show=show, queue=figures)
+    workers = int(os.environ['MVP_WORKERS']) if os.environ.get('MVP_WORKERS') else None
+    rendered, skipped = figure_render.render(figures, workers=workers)
+    print(f"Figuras: {len(rendered)} renderizadas, {len(skipped)} sem mudança")
     print("Baseline lag-1  -> MAE:", base_mae, "RMSE:", base_rmse)
     print("Linear v1       -> MAE:", lin_mae, "RMSE:", lin_rmse)
     print("Linear v2 (WE)  -> MAE:", lin2_mae, "RMSE:", lin2_rmse)
@@ -0,0 +1,72 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+# Calendar columns computed once per timestamp index and shared by every pipeline.
+# Arrays are compact (int8/int16/bool) and read-only because callers share them.
+
+HOLIDAY_START = '1998-01-01'
+HOLIDAY_END = '2030-12-31'
+SEASONS = ['inverno', 'primavera', 'verao', 'outono']
+MAX_CACHED = 8
+
+_holidays = {}
+_store = OrderedDict()
+
+def holiday_days(start=HOLIDAY_START, end=HOLIDAY_END):
+    # Sorted day numbers (days since epoch); the table only grows when asked for
+    # dates outside the span already built.
+    lo, hi = _holidays.get('span', (None, None))
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if lo is None or start < lo or end > hi:
+        lo = start if lo is None else min(lo, start)
+        hi = end if hi is None else max(hi, end)
+        days = USFederalHolidayCalendar().holidays(start=lo, end=hi)
+        _holidays['days'] = np.asarray(days.values.astype('datetime64[D]').astype(np.int64))
+        _holidays['span'] = (lo, hi)
+    return _holidays['days']
+
+def _freeze(a):
+    a.flags.writeable = False
+    return a
+
+def _compute(ns):
+    days = ns.astype('datetime64[D]')
+    d = days.astype(np.int64)
+    months = days.astype('datetime64[M]')
+    m = months.astype(np.int64)
+    month = (m % 12 + 1).astype(np.int8)
+    dow = ((d + 3) % 7).astype(np.int8)
+    weekend = dow >= 5
+    lo, hi = (str(days.min()), str(days.max())) if len(d) else (HOLIDAY_START, HOLIDAY_END)
+    hol = holiday_days(min(lo, HOLIDAY_START), max(hi, HOLIDAY_END))
+    return {
+        'hour': ((ns - days).astype('timedelta64[h]').astype(np.int64)).astype(np.int8),
+        'dayofweek': dow,
+        'day': ((days - months.astype('datetime64[D]')).astype(np.int64) + 1).astype(np.int8),
+        'month': month,
+        'year': (m // 12 + 1970).astype(np.int16),
+        'season': np.select([month <= 2, month <= 5, month <= 8, month <= 11], [0, 1, 2, 3], 0).astype(np.int8),
+        'weekend': weekend,
+        'weekday': ~weekend,
+        'holiday': np.isin(d, hol),
+    }
+
+def calendar_arrays(dt):
+    # dt: Series / DatetimeIndex / datetime64 array without NaT
+    ns = np.asarray(dt, dtype='datetime64[ns]')
+    key = (len(ns), hashlib.md5(ns.view(np.int64).tobytes()).hexdigest())
+    out = _store.get(key)
+    if out is None:
+        out = {k: _freeze(v) for k, v in _compute(ns).items()}
+        _store[key] = out
+        if len(_store) > MAX_CACHED:
+            _store.popitem(last=False)
+    else:
+        _store.move_to_end(key)
+    return out
+
+def season_names(codes):
+    return pd.Categorical.from_codes(np.asarray(codes), categories=SEASONS)
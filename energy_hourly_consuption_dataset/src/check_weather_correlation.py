@@ -2,16 +2,18 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+try:
+    from src import dataset_cache
+except ImportError:
+    import dataset_cache
 
 def main():
-    # Load integrated data
-    path = os.path.join('data', 'processed', 'pjm_integrated.csv')
-    if not os.path.exists(path):
-        print(f"File not found: {path}")
+    # Load integrated data (typed columnar cache, rebuilt when raw files change)
+    try:
+        df = dataset_cache.load_integrated(os.getcwd())
+    except FileNotFoundError as e:
+        print(f"File not found: {e}")
         return
-
-    df = pd.read_csv(path)
-    df['Datetime'] = pd.to_datetime(df['Datetime'])
     
     # Filter for 2018 where we have weather data
     df_2018 = df[df['Datetime'].dt.year == 2018].copy()
@@ -2,16 +2,48 @@ import os
 import io
 import re
 import time
+import json
+import hashlib
+import threading
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import seaborn as sns
 import matplotlib.pyplot as plt
+try:
+    from src import dataset_cache
+    from src import calendar_features
+except ImportError:
+    import dataset_cache
+    import calendar_features
 
 ROOT = os.getcwd()
+REFRESH_SECONDS = 30
+WORKERS = 8
+LATENCY_WINDOW = 2048
+MAX_POINTS = 2000
+MAX_POINTS_LIMIT = 20000
+
+# Results are computed once per (h2_params.yaml mtime, data hash) and served from
+# memory; a background thread rebuilds them when either changes.
+_state = {}
+_state_lock = threading.Lock()
+_data_key = {}
+# pyplot keeps global state, so every figure is drawn on this single thread.
+_render_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='render')
+_latency = {}
+_latency_lock = threading.Lock()
+
+def params_path():
+    return os.path.join(ROOT, 'configs', 'h2_params.yaml')
 
 def read_operational_params():
-    path = os.path.join(ROOT, 'configs', 'h2_params.yaml')
+    path = params_path()
     params = {'capacity_mw': 10, 'kwh_per_kg': 52, 'offpeak_percentile': 25, 'emission_factor_kg_per_kwh': 0.0004}
     if not os.path.exists(path):
         return params
@@ -26,17 +58,7 @@ def read_operational_params():
     return params
 
 def load_integrated():
-    p1 = os.path.join(ROOT, 'data', 'processed', 'pjm_integrated.csv')
-    p2 = os.path.join(ROOT, 'data', 'processed', 'pjm_dataset.csv')
-    if os.path.exists(p1):
-        df = pd.read_csv(p1, low_memory=False)
-    elif os.path.exists(p2):
-        df = pd.read_csv(p2, low_memory=False)
-    else:
-        raise FileNotFoundError('Integrated dataset not found')
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df = df.dropna(subset=['Datetime']).sort_values('Datetime')
-    return df
+    return dataset_cache.load_integrated(ROOT)
 
 def select_load(df):
     cols = [c for c in df.columns if c != 'Datetime']
@@ -49,9 +71,10 @@ def select_load(df):
 
 def add_calendar(df):
     d = df.copy()
-    d['hora'] = d['Datetime'].dt.hour
-    d['dia_semana'] = d['Datetime'].dt.dayofweek
-    d['mes'] = d['Datetime'].dt.month
+    cal = calendar_features.calendar_arrays(d['Datetime'])
+    d['hora'] = cal['hour']
+    d['dia_semana'] = cal['dayofweek']
+    d['mes'] = cal['month']
     return d
 
 def compute_offpeak(df, percentile):
@@ -70,7 +93,156 @@ def estimate_h2(df, capacity_mw, kwh_per_kg, emission_factor_kg_per_kwh):
     d['h2_co2e_kg'] = d['h2_kg'] * d['co2e_kg_per_kg']
     return d
 
-def render_home(params, summary, images):
+def compute_results(params, df):
+    load = select_load(df)
+    load = add_calendar(load)
+    load = compute_offpeak(load, params['offpeak_percentile'])
+    return estimate_h2(load, params['capacity_mw'], params['kwh_per_kg'], params['emission_factor_kg_per_kwh'])
+
+def summarize(res):
+    return {
+        'hours_offpeak': int(res['offpeak'].sum()),
+        'h2_total_kg': float(res['h2_kg'].sum()),
+        'co2e_kg_per_kg': float(res['co2e_kg_per_kg'].iloc[0]),
+    }
+
+def _draw_potential_png(res):
+    plt.figure(figsize=(12,5))
+    sns.lineplot(x=res['Datetime'], y=res['load_total'], label='Load')
+    sns.lineplot(x=res['Datetime'], y=res['h2_kg'], label='H2 kg/h')
+    plt.legend()
+    plt.tight_layout()
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png')
+    plt.close()
+    return buf.getvalue()
+
+def render_potential_png(res):
+    return _render_pool.submit(_draw_potential_png, res).result()
+
+def data_key():
+    # The source hash is only recomputed when a source file's size/mtime changes.
+    files, _ = dataset_cache.integrated_sources(ROOT)
+    stats = tuple((p, os.stat(p).st_size, os.stat(p).st_mtime) for p in files)
+    if _data_key.get('stats') != stats:
+        _data_key['key'] = dataset_cache.current_key(ROOT)
+        _data_key['stats'] = stats
+    return _data_key['key']
+
+def state_key():
+    path = params_path()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    return (mtime, data_key())
+
+def series_arrays(df, res):
+    # Sorted epoch-second index plus one float32 array per column, for range queries.
+    cols = {c: pd.to_numeric(df[c], errors='coerce').values.astype(np.float32) for c in df.columns if c != 'Datetime'}
+    cols['load_total'] = res['load_total'].values.astype(np.float32)
+    cols['h2_kg'] = res['h2_kg'].values.astype(np.float32)
+    return {'t': df['Datetime'].values.astype('datetime64[s]').astype(np.int64), 'columns': cols}
+
+def minmax_downsample(t, v, max_points):
+    # Equal-width buckets keep their min and max sample in time order, so peaks and
+    # troughs survive; all-NaN buckets are dropped.
+    n = len(v)
+    if n <= max_points:
+        return t, v
+    nb = max(max_points // 2, 1)
+    w = -(-n // nb)
+    pad = np.full(nb * w, np.nan, dtype=np.float32)
+    pad[:n] = v
+    pad = pad.reshape(nb, w)
+    nan = np.isnan(pad)
+    ok = ~nan.all(axis=1)
+    base = np.arange(nb) * w
+    imin = base + np.where(nan, np.inf, pad).argmin(axis=1)
+    imax = base + np.where(nan, -np.inf, pad).argmax(axis=1)
+    idx = np.sort(np.stack([imin, imax], axis=1)[ok], axis=1).ravel()
+    idx = idx[np.r_[True, np.diff(idx) != 0]]
+    return t[idx], v[idx]
+
+def _epoch(text, end=False):
+    ts = pd.Timestamp(text)
+    if end and len(text) <= 10:
+        ts = ts + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    return int(ts.value // 10**9)
+
+def query_series(series, zone, start=None, end=None, max_points=MAX_POINTS):
+    if zone not in series['columns']:
+        raise KeyError(zone)
+    t = series['t']
+    i0 = int(np.searchsorted(t, _epoch(start), 'left')) if start else 0
+    i1 = int(np.searchsorted(t, _epoch(end, True), 'right')) if end else len(t)
+    v = series['columns'][zone][i0:i1]
+    tt, vv = minmax_downsample(t[i0:i1], v, max(2, min(int(max_points), MAX_POINTS_LIMIT)))
+    return tt, vv, i1 - i0
+
+def build_state(key):
+    params = read_operational_params()
+    df = load_integrated()
+    res = compute_results(params, df)
+    png = render_potential_png(res)
+    return {
+        'key': key,
+        'params': params,
+        'summary': summarize(res),
+        'series': series_arrays(df, res),
+        'png': png,
+        'etag': '"' + hashlib.md5(png).hexdigest() + '"',
+    }
+
+def get_state():
+    with _state_lock:
+        if not _state:
+            _state.update(build_state(state_key()))
+        return dict(_state)
+
+def refresh_state():
+    key = state_key()
+    with _state_lock:
+        if _state.get('key') == key:
+            return False
+    st = build_state(key)
+    with _state_lock:
+        _state.update(st)
+    return True
+
+def _refresh_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            if refresh_state():
+                print('Cache do dashboard atualizado')
+        except Exception as e:
+            print(f'Falha ao atualizar cache: {e}')
+
+def start_refresher(interval=REFRESH_SECONDS):
+    t = threading.Thread(target=_refresh_loop, args=(interval,), daemon=True)
+    t.start()
+    return t
+
+def record_latency(route, seconds):
+    with _latency_lock:
+        item = _latency.setdefault(route, {'count': 0, 'samples': deque(maxlen=LATENCY_WINDOW)})
+        item['count'] += 1
+        item['samples'].append(seconds)
+
+def latency_summary():
+    # Percentiles over the last LATENCY_WINDOW requests of each route, in ms.
+    with _latency_lock:
+        items = {r: (it['count'], np.array(it['samples'])) for r, it in _latency.items()}
+    out = {}
+    for route, (count, v) in sorted(items.items()):
+        p50, p90, p99 = np.percentile(v, [50, 90, 99]) * 1000.0
+        out[route] = {'count': count, 'p50_ms': round(p50, 3), 'p90_ms': round(p90, 3),
+                      'p99_ms': round(p99, 3), 'max_ms': round(float(v.max()) * 1000.0, 3)}
+    return out
+
+def route_of(path):
+    route = path.split('?', 1)[0]
+    return '/static/' if route.startswith('/static/') else route
+
+def render_home(params, summary, images, etag=''):
     html = []
     html.append('<html><head><title>Dashboard H2</title><meta http-equiv="refresh" content="30"></head><body>')
     html.append('<h1>Dashboard H2 – Dados PJM</h1>')
@@ -78,8 +250,8 @@ def render_home(params, summary, images):
     html.append(f"<p>Capacidade: {params['capacity_mw']} MW | Eficiência: {params['kwh_per_kg']} kWh/kg | Off-peak: {params['offpeak_percentile']}% | Fator emissões: {params['emission_factor_kg_per_kwh']} kg/kWh</p>")
     html.append('<h2>Sumário</h2>')
     html.append(f"<p>Horas off-peak: {summary['hours_offpeak']} | H2 total (kg): {summary['h2_total_kg']:.0f} | CO2e/kg: {summary['co2e_kg_per_kg']:.3f}</p>")
-    ts = int(time.time())
-    html.append(f"<h2>Potencial horário</h2><img src='/figure/h2_potential.png?ts={ts}' style='max-width:100%'>")
+    version = etag.strip('"')
+    html.append(f"<h2>Potencial horário</h2><img src='/figure/h2_potential.png?v={version}' style='max-width:100%'>")
     html.append('<h2>Figuras EDA/MVP</h2>')
     html.append('<ul>')
     for name in images:
@@ -96,60 +268,53 @@ def list_images():
     return sorted(names)
 
 class DashboardHandler(BaseHTTPRequestHandler):
+    def send_bytes(self, data, content_type, headers=None, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
     def do_GET(self):
+        t0 = time.perf_counter()
         try:
+            self.handle_get()
+        finally:
+            record_latency(route_of(self.path), time.perf_counter() - t0)
+
+    def handle_get(self):
+        try:
+            if self.path.startswith('/metrics'):
+                body = json.dumps({'workers': self.server.workers, 'routes': latency_summary()}, indent=2)
+                self.send_bytes(body.encode('utf-8'), 'application/json')
+                return
+            if self.path.startswith('/api/series'):
+                self.handle_series()
+                return
             if self.path.startswith('/figure/h2_potential.png'):
-                params = read_operational_params()
-                df = load_integrated()
-                load = select_load(df)
-                load = add_calendar(load)
-                load = compute_offpeak(load, params['offpeak_percentile'])
-                res = estimate_h2(load, params['capacity_mw'], params['kwh_per_kg'], params['emission_factor_kg_per_kwh'])
-                plt.figure(figsize=(12,5))
-                sns.lineplot(x=res['Datetime'], y=res['load_total'], label='Load')
-                sns.lineplot(x=res['Datetime'], y=res['h2_kg'], label='H2 kg/h')
-                plt.legend()
-                plt.tight_layout()
-                buf = io.BytesIO()
-                plt.savefig(buf, format='png')
-                plt.close()
-                data = buf.getvalue()
-                self.send_response(200)
-                self.send_header('Content-Type', 'image/png')
-                self.send_header('Content-Length', str(len(data)))
-                self.end_headers()
-                self.wfile.write(data)
+                st = get_state()
+                if self.headers.get('If-None-Match') == st['etag']:
+                    self.send_response(304)
+                    self.send_header('ETag', st['etag'])
+                    self.end_headers()
+                    return
+                self.send_bytes(st['png'], 'image/png', {'ETag': st['etag'], 'Cache-Control': 'no-cache'})
                 return
             if self.path.startswith('/static/'):
                 name = self.path.split('/static/', 1)[1]
                 full = os.path.join(ROOT, 'reports', 'figures', name)
                 if os.path.isfile(full):
                     data = open(full, 'rb').read()
-                    self.send_response(200)
-                    self.send_header('Content-Type', 'image/png')
-                    self.send_header('Content-Length', str(len(data)))
-                    self.end_headers()
-                    self.wfile.write(data)
+                    self.send_bytes(data, 'image/png')
                     return
                 self.send_error(404)
                 return
-            params = read_operational_params()
-            df = load_integrated()
-            load = select_load(df)
-            load = add_calendar(load)
-            load = compute_offpeak(load, params['offpeak_percentile'])
-            res = estimate_h2(load, params['capacity_mw'], params['kwh_per_kg'], params['emission_factor_kg_per_kwh'])
-            hours_offpeak = int(res['offpeak'].sum())
-            h2_total_kg = float(res['h2_kg'].sum())
-            co2e_kg_per_kg = float(res['co2e_kg_per_kg'].iloc[0])
+            st = get_state()
             images = list_images()
-            html = render_home(params, {'hours_offpeak': hours_offpeak, 'h2_total_kg': h2_total_kg, 'co2e_kg_per_kg': co2e_kg_per_kg}, images)
-            data = html.encode('utf-8')
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Content-Length', str(len(data)))
-            self.end_headers()
-            self.wfile.write(data)
+            html = render_home(st['params'], st['summary'], images, st['etag'])
+            self.send_bytes(html.encode('utf-8'), 'text/html; charset=utf-8')
         except Exception as e:
             msg = f'Erro: {str(e)}'.encode('utf-8')
             self.send_response(500)
@@ -158,8 +323,65 @@ class DashboardHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(msg)
 
-def run_server(port=8000):
-    httpd = HTTPServer(('0.0.0.0', port), DashboardHandler)
+    def handle_series(self):
+        # /api/series?zone=&start=&end=&max_points=&format=json|f32
+        q = {k: v[-1] for k, v in parse_qs(urlparse(self.path).query).items()}
+        series = get_state()['series']
+        zone = q.get('zone', 'load_total')
+        try:
+            t, v, n = query_series(series, zone, q.get('start'), q.get('end'), q.get('max_points', MAX_POINTS))
+        except (KeyError, ValueError) as e:
+            body = json.dumps({'error': f'parâmetro inválido: {e}', 'zones': sorted(series['columns'])})
+            self.send_bytes(body.encode('utf-8'), 'application/json', status=400)
+            return
+        if q.get('format') == 'f32':
+            # Rows of (hours since X-Series-Start, value) as little-endian float32.
+            t0 = int(t[0]) if len(t) else 0
+            out = np.empty((len(t), 2), dtype='<f4')
+            out[:, 0] = (t - t0) / 3600.0
+            out[:, 1] = v
+            headers = {'X-Series-Start': str(t0), 'X-Series-Rows': str(n)}
+            self.send_bytes(out.tobytes(), 'application/octet-stream', headers)
+            return
+        body = {
+            'zone': zone,
+            'rows_in_range': n,
+            'points': len(t),
+            't': t.tolist(),
+            'v': [None if x != x else round(float(x), 3) for x in v],
+        }
+        self.send_bytes(json.dumps(body, separators=(',', ':')).encode('utf-8'), 'application/json')
+
+class PooledHTTPServer(HTTPServer):
+    # Connections are handled on a fixed thread pool. When every worker is busy the
+    # accept loop blocks and new clients wait in the listen backlog.
+    def __init__(self, addr, handler, workers=WORKERS):
+        super().__init__(addr, handler)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        self.slots = threading.BoundedSemaphore(workers)
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+def run_server(port=8000, workers=WORKERS):
+    httpd = PooledHTTPServer(('0.0.0.0', port), DashboardHandler, workers)
+    get_state()
+    start_refresher()
     print(f'http://localhost:{port}/')
     httpd.serve_forever()
 
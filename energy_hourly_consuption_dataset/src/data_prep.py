@@ -1,34 +1,138 @@
 import os
+import io
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 try:
     from src import meteo_ingest
+    from src import quality_checks
 except ImportError:
     import meteo_ingest
+    import quality_checks
 
-def load_raw(root):
+RAW_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def raw_zone_files(root):
     raw = os.path.join(root, 'data', 'raw')
-    series = {}
+    files = []
     for name in os.listdir(raw):
         if not name.lower().endswith('.csv'):
             continue
         if name.endswith('_hourly.csv') or name == 'PJM_Load_hourly.csv':
-            path = os.path.join(raw, name)
-            df = pd.read_csv(path, low_memory=False)
-            df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-            df = df.dropna(subset=['Datetime']).sort_values('Datetime')
-            val_col = [c for c in df.columns if c != 'Datetime'][0]
-            zone = val_col.replace('_MW', '')
-            series[zone] = df[['Datetime', val_col]].rename(columns={val_col: zone})
-    return series
+            files.append(os.path.join(raw, name))
+    return files
+
+def _read_zone_table(path):
+    # The pyarrow reader is multi-threaded and parses ISO timestamps natively;
+    # without it the C engine keeps Datetime as text for the fixed-format parse.
+    try:
+        return pd.read_csv(path, engine='pyarrow')
+    except ImportError:
+        return pd.read_csv(path, dtype={'Datetime': str})
+
+def _parse_datetimes(col):
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    dt = pd.to_datetime(col, format=RAW_DATETIME_FORMAT, errors='coerce')
+    bad = dt.isna() & col.notna()
+    if bad.any():
+        dt[bad] = pd.to_datetime(col[bad], errors='coerce')
+    return dt
+
+def _zone_arrays(df):
+    val_col = [c for c in df.columns if c != 'Datetime'][0]
+    dt = _parse_datetimes(df['Datetime'])
+    ok = dt.notna().values
+    ts = dt.values[ok].astype('datetime64[s]').astype(np.int64)
+    values = pd.to_numeric(df[val_col], errors='coerce').values[ok].astype(np.float32)
+    order = np.argsort(ts, kind='stable')
+    return val_col.replace('_MW', ''), ts[order], values[order]
+
+def parse_zone_file(path):
+    # Returns plain numpy buffers (int64 epoch seconds, float32 MW) sorted by
+    # time, so process-pool workers never pickle DataFrames back.
+    t0 = time.perf_counter()
+    zone, ts, values = _zone_arrays(_read_zone_table(path))
+    return zone, ts, values, time.perf_counter() - t0
+
+def parse_zone_tail(path, offset, size):
+    # Parses only bytes [offset, size) of a raw file, reusing its header line.
+    # Returns None when offset does not fall on a line boundary.
+    with open(path, 'rb') as f:
+        header = f.readline()
+        if offset < len(header):
+            return None
+        f.seek(offset - 1)
+        if f.read(1) != b'\n':
+            return None
+        tail = f.read(size - offset)
+    df = pd.read_csv(io.BytesIO(header + tail), dtype={'Datetime': str})
+    return _zone_arrays(df)
+
+def load_raw_arrays(root, workers=None, verbose=False):
+    files = raw_zone_files(root)
+    if workers is None:
+        workers = min(len(files), os.cpu_count() or 1)
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parsed = list(ex.map(parse_zone_file, files))
+    else:
+        parsed = [parse_zone_file(p) for p in files]
+    arrays = {}
+    for path, (zone, ts, values, elapsed) in zip(files, parsed):
+        arrays[zone] = (ts, values)
+        if verbose:
+            print(f"{os.path.basename(path)}: {len(ts)} rows in {elapsed:.3f}s")
+    return arrays
+
+def arrays_to_frame(zone, ts, values):
+    return pd.DataFrame({'Datetime': ts.astype('datetime64[s]').astype('datetime64[ns]'), zone: values})
+
+def load_raw(root, workers=None, verbose=False):
+    arrays = load_raw_arrays(root, workers=workers, verbose=verbose)
+    return {zone: arrays_to_frame(zone, ts, values) for zone, (ts, values) in arrays.items()}
+
+def scatter_mean(pos, values, n):
+    # Places values at integer positions, averaging the ones that collide
+    # (same rule as the `mean` aggregation of duplicated timestamps).
+    values = np.asarray(values, dtype=np.float64)
+    ok = np.isfinite(values)
+    pos = pos[ok]
+    total = np.bincount(pos, weights=values[ok], minlength=n)
+    count = np.bincount(pos, minlength=n)
+    out = np.full(n, np.nan)
+    has = count > 0
+    out[has] = total[has] / count[has]
+    return out, count
+
+def integrate_arrays(arrays):
+    # Single-pass k-way integration: the union hourly index is built once and
+    # each zone is scattered into its own column (duplicated timestamps are
+    # averaged), instead of an outer merge per zone.
+    zones = list(arrays)
+    if not zones:
+        return pd.DataFrame({'Datetime': pd.Series([], dtype='datetime64[ns]')})
+    index = np.unique(np.concatenate([ts for ts, _ in arrays.values()]))
+    n = len(index)
+    mat = np.empty((n, len(zones)), dtype=np.float32)
+    for j, zone in enumerate(zones):
+        ts, values = arrays[zone]
+        pos = np.searchsorted(index, ts)
+        mat[:, j], _ = scatter_mean(pos, values, n)
+    out = pd.DataFrame(mat, columns=zones, copy=False)
+    out.insert(0, 'Datetime', index.astype('datetime64[s]').astype('datetime64[ns]'))
+    return out
 
 def integrate(series):
-    base = None
+    arrays = {}
     for zone, df in series.items():
-        if base is None:
-            base = df.copy()
-        else:
-            base = pd.merge(base, df, on='Datetime', how='outer')
-    return base
+        ts = pd.to_datetime(df['Datetime']).values.astype('datetime64[s]').astype(np.int64)
+        arrays[zone] = (ts, df[zone].values)
+    return integrate_arrays(arrays)
 
 def write_csv(root, df, name):
     out_dir = os.path.join(root, 'data', 'processed')
@@ -37,32 +141,190 @@ def write_csv(root, df, name):
     df.to_csv(path, index=False)
     return path
 
-def main():
-    root = os.getcwd()
-    series = load_raw(root)
-    integrated = integrate(series)
-    
+def build_integrated(root, workers=None, verbose=False):
+    t0 = time.perf_counter()
+    arrays = load_raw_arrays(root, workers=workers, verbose=verbose)
+    if verbose:
+        print(f"Raw ingest: {len(arrays)} files in {time.perf_counter() - t0:.3f}s")
+    integrated = integrate_arrays(arrays)
+
     # Weather integration
     meteo_df = meteo_ingest.load_meteo_dir(root)
     if meteo_df is not None:
         integrated = meteo_ingest.join_meteo(integrated, meteo_df)
-        print("Weather data integrated.")
-    else:
+        if verbose:
+            print("Weather data integrated.")
+    elif verbose:
         print("No weather data found.")
+    return integrated
+
+def read_csv_bounds(path):
+    # Header columns and last Datetime of a processed CSV, read from both ends.
+    with open(path, 'rb') as f:
+        header = f.readline().decode('utf-8').strip().split(',')
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = [ln for ln in f.read().splitlines() if ln.strip()]
+    last = pd.Timestamp(lines[-1].split(b',')[0].decode('utf-8')) if len(lines) > 1 else None
+    return header, last
+
+def _parquet_path(root):
+    # Dataset directory: part-00000 holds the full build and every incremental
+    # refresh adds the next part; pd.read_parquet(path) reads all parts in order.
+    return os.path.join(root, 'data', 'processed', 'pjm_dataset.parquet')
+
+def _parquet_parts(path):
+    return sorted(n for n in os.listdir(path) if n.startswith('part-') and n.endswith('.parquet'))
+
+def _remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _write_part(path, df, index):
+    # Written under a hidden name first so readers never see a partial part
+    name = f'part-{index:05d}.parquet'
+    tmp = os.path.join(path, '.' + name + '.tmp')
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, os.path.join(path, name))
+
+def write_parquet(root, df, verbose=False):
+    # Optional export; on failure any previous dataset is removed so no reader
+    # picks up data that disagrees with the CSV.
+    path = _parquet_path(root)
+    tmp = path + '.tmp'
+    try:
+        _remove_path(tmp)
+        os.makedirs(tmp)
+        _write_part(tmp, df, 0)
+        _remove_path(path)
+        os.replace(tmp, path)
+        if verbose:
+            print(f"Parquet saved: {path}")
+        return path
+    except ImportError:
+        msg = "Parquet export skipped: pyarrow or fastparquet not found."
+    except Exception as e:
+        msg = f"Parquet export failed: {e}"
+    _remove_path(tmp)
+    _remove_path(path)
+    if verbose:
+        print(msg)
+    return None
+
+def append_parquet(root, rows, verbose=False):
+    # Writes only the new rows as the next part, cast to the schema of the first
+    # part (read from its footer). A single-file export from older runs, or a
+    # failed part write, falls back to a full rewrite from the CSV.
+    path = _parquet_path(root)
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow.parquet as pq
+        parts = _parquet_parts(path)
+        dtypes = pq.read_schema(os.path.join(path, parts[0])).empty_table().to_pandas().dtypes
+        new = rows.reindex(columns=dtypes.index).astype(dtypes.to_dict())
+        _write_part(path, new, int(parts[-1][5:10]) + 1)
+        if verbose:
+            print(f"Parquet part added: {len(new)} rows -> {path}")
+        return path
+    except Exception:
+        df = pd.read_csv(os.path.join(root, 'data', 'processed', 'pjm_integrated.csv'), parse_dates=['Datetime'])
+    return write_parquet(root, df, verbose=verbose)
+
+def _offsets_path(root):
+    return os.path.join(root, 'data', 'processed', 'pjm_integrated.offsets.json')
+
+def read_applied_offsets(root):
+    p = _offsets_path(root)
+    if not os.path.exists(p):
+        return {}
+    with open(p, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_applied_offsets(root, offsets):
+    with open(_offsets_path(root), 'w', encoding='utf-8') as f:
+        json.dump(offsets, f, indent=2)
+
+def _zone_keys(root):
+    return {p: os.path.relpath(p, root).replace('\\', '/') for p in raw_zone_files(root)}
+
+def refresh_incremental(root, verbose=False):
+    # Appends rows added to the raw CSVs since the last run to the processed store.
+    # The byte offset already applied per file must be a segment boundary recorded
+    # in manifest.json; only bytes after it are parsed. Returns False when that does
+    # not hold (or new rows land before the last written hour) so the caller falls
+    # back to a full rebuild; every check runs before anything is written, and the
+    # zone matrix and Parquet export are updated only after the CSV append.
+    try:
+        from src import zone_matrix
+    except ImportError:
+        import zone_matrix
+    csv_path = os.path.join(root, 'data', 'processed', 'pjm_integrated.csv')
+    applied = read_applied_offsets(root)
+    if not os.path.exists(csv_path) or not applied:
+        return False
+    quality_checks.refresh_manifest(root, quality_checks.list_raw_files(root))
+    entries, _ = quality_checks.read_manifest_entries(root)
+    tails = {}
+    offsets = {}
+    for p, key in _zone_keys(root).items():
+        entry = entries[key]
+        done = applied.get(key)
+        offsets[key] = entry['size']
+        if done == entry['size']:
+            continue
+        bounds = {seg['offset'] for seg in entry.get('segments', [])}
+        if done is None or done > entry['size'] or done not in bounds:
+            return False
+        parsed = parse_zone_tail(p, done, entry['size'])
+        if parsed is None:
+            return False
+        zone, ts, values = parsed
+        tails[zone] = (ts, values)
+        if verbose:
+            print(f"{os.path.basename(p)}: {len(ts)} new rows")
+    if not tails:
+        if verbose:
+            print("No new rows in raw files.")
+        return True
+    rows = integrate_arrays(tails)
+    header, last = read_csv_bounds(csv_path)
+    if last is None or rows['Datetime'].iloc[0] <= last or not set(rows.columns) <= set(header):
+        return False
+    meteo_df = meteo_ingest.load_meteo_dir(root)
+    if meteo_df is not None:
+        rows = meteo_ingest.join_meteo(rows, meteo_df)
+    rows = rows.reindex(columns=header)
+    rows.to_csv(csv_path, mode='a', header=False, index=False)
+    write_applied_offsets(root, offsets)
+    if verbose:
+        print(f"CSV appended: {len(rows)} rows -> {csv_path}")
+    zone_matrix.append_rows(root, tails)
+    append_parquet(root, rows, verbose=verbose)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Integrate the PJM hourly CSVs.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to parse raw files (1 = sequential)")
+    parser.add_argument("--incremental", action="store_true", help="Only parse rows appended since the last manifest")
+    args = parser.parse_args()
+    root = os.getcwd()
+    if args.incremental:
+        if refresh_incremental(root, verbose=True):
+            return
+        print("Changes are not append-only; running a full rebuild.")
+    quality_checks.refresh_manifest(root, quality_checks.list_raw_files(root))
+    entries, _ = quality_checks.read_manifest_entries(root)
+    integrated = build_integrated(root, workers=args.workers, verbose=True)
 
     path_csv = write_csv(root, integrated, 'pjm_integrated.csv')
+    write_applied_offsets(root, {key: entries[key]['size'] for key in _zone_keys(root).values()})
     print(f"CSV saved: {path_csv}")
     
     # Parquet support (optional)
-    try:
-        out_dir = os.path.join(root, 'data', 'processed')
-        path_parquet = os.path.join(out_dir, 'pjm_dataset.parquet')
-        integrated.to_parquet(path_parquet, index=False)
-        print(f"Parquet saved: {path_parquet}")
-    except ImportError:
-        print("Parquet export skipped: pyarrow or fastparquet not found.")
-    except Exception as e:
-        print(f"Parquet export failed: {e}")
+    write_parquet(root, integrated, verbose=True)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,150 @@
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+try:
+    from src import data_prep
+    from src import quality_checks
+except ImportError:
+    import data_prep
+    import quality_checks
+
+CACHE_NAME = 'pjm_integrated.cache'
+NON_ZONE_COLUMNS = ['Datetime', 'temp_c', 'wind_ms', 'irradiance_wm2']
+
+def processed_dir(root):
+    return os.path.join(root, 'data', 'processed')
+
+def _rel(root, path):
+    return os.path.relpath(path, root).replace('\\', '/')
+
+def raw_source_files(root):
+    raw = os.path.join(root, 'data', 'raw')
+    files = []
+    if os.path.isdir(raw):
+        for name in sorted(os.listdir(raw)):
+            if name.endswith('_hourly.csv') or name == 'PJM_Load_hourly.csv':
+                files.append(os.path.join(raw, name))
+    meteo = os.path.join(root, 'data', 'external', 'meteo')
+    if files and os.path.isdir(meteo):
+        for name in sorted(os.listdir(meteo)):
+            if name.lower().endswith('.csv'):
+                files.append(os.path.join(meteo, name))
+    return files
+
+def processed_source_file(root):
+    for name in ['pjm_integrated.csv', 'pjm_dataset.csv']:
+        p = os.path.join(processed_dir(root), name)
+        if os.path.exists(p):
+            return p
+    return None
+
+def source_signature(root, files):
+    # Hash per source file; the manifest chain_md5 is reused when the file has not
+    # been touched since the manifest was written, otherwise the file is hashed.
+    # (chain_md5 equals the md5 until rows are appended; md5 itself may be deferred.)
+    items, man_mtime = quality_checks.read_manifest_entries(root)
+    sig = {}
+    for p in files:
+        rel = _rel(root, p)
+        st = os.stat(p)
+        it = items.get(rel)
+        if it is not None and it.get('size') == st.st_size and man_mtime is not None and st.st_mtime <= man_mtime:
+            sig[rel] = it.get('chain_md5') or it['md5']
+        else:
+            sig[rel] = quality_checks.md5_file(p)
+    return sig
+
+def signature_key(sig):
+    text = json.dumps(sorted(sig.items()))
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+def _meta_path(root):
+    return os.path.join(processed_dir(root), CACHE_NAME + '.json')
+
+def read_cache_meta(root):
+    p = _meta_path(root)
+    if not os.path.exists(p):
+        return None
+    with open(p, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def to_columnar(df):
+    d = df.copy()
+    d['Datetime'] = pd.to_datetime(d['Datetime'], errors='coerce')
+    d = d.dropna(subset=['Datetime']).sort_values('Datetime', kind='stable').reset_index(drop=True)
+    cols = {'Datetime': d['Datetime'].values.astype('datetime64[s]').astype(np.int64)}
+    for c in d.columns:
+        if c == 'Datetime':
+            continue
+        v = pd.to_numeric(d[c], errors='coerce')
+        cols[c] = v.values.astype(np.float32) if c not in NON_ZONE_COLUMNS else v.values.astype(np.float64)
+    return pd.DataFrame(cols)
+
+def from_columnar(tab):
+    df = pd.DataFrame(tab)
+    df['Datetime'] = pd.to_datetime(df['Datetime'].values, unit='s')
+    return df
+
+def write_cache(root, df, key, sources):
+    out_dir = processed_dir(root)
+    os.makedirs(out_dir, exist_ok=True)
+    tab = to_columnar(df)
+    try:
+        path = os.path.join(out_dir, CACHE_NAME + '.parquet')
+        tab.to_parquet(path, index=False)
+        fmt = 'parquet'
+    except ImportError:
+        path = os.path.join(out_dir, CACHE_NAME + '.npz')
+        np.savez(path, **{c: tab[c].values for c in tab.columns})
+        fmt = 'npz'
+    meta = {
+        'key': key,
+        'format': fmt,
+        'file': os.path.basename(path),
+        'columns': list(tab.columns),
+        'rows': int(len(tab)),
+        'sources': sources,
+    }
+    with open(_meta_path(root), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return tab
+
+def read_cache(root, meta):
+    path = os.path.join(processed_dir(root), meta['file'])
+    if not os.path.exists(path):
+        return None
+    if meta['format'] == 'parquet':
+        tab = pd.read_parquet(path)
+    else:
+        with np.load(path) as z:
+            tab = {c: z[c] for c in meta['columns']}
+    return tab
+
+def integrated_sources(root):
+    files = raw_source_files(root)
+    if files:
+        return files, lambda: data_prep.build_integrated(root)
+    src = processed_source_file(root)
+    if src is None:
+        raise FileNotFoundError('Integrated dataset not found')
+    return [src], lambda: pd.read_csv(src, low_memory=False)
+
+def current_key(root):
+    # Cheap data hash for callers that only need to know whether the sources changed.
+    files, _ = integrated_sources(root)
+    return signature_key(source_signature(root, files))
+
+def load_integrated(root, rebuild=False):
+    files, build = integrated_sources(root)
+    sig = source_signature(root, files)
+    key = signature_key(sig)
+    meta = read_cache_meta(root)
+    tab = None
+    if not rebuild and meta is not None and meta.get('key') == key:
+        tab = read_cache(root, meta)
+    if tab is None:
+        tab = write_cache(root, build(), key, sig)
+    return from_columnar(tab)
@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Figure specs are plain dicts of small numpy arrays and labels, built in the
+# caller and drawn by worker processes on the Agg backend. Histograms are binned
+# in the caller and the KDE is a Gaussian smoothing of a fine histogram (FFT
+# convolution), so no worker ever sees the raw points. A spec whose hash matches
+# the one recorded next to an existing PNG is skipped.
+
+INDEX_NAME = '.figure_hashes.json'
+KDE_GRID = 1024
+KDE_CUT = 3
+RENDER_VERSION = 1
+
+def _finite(values):
+    v = np.asarray(values, dtype=float)
+    return v[np.isfinite(v)]
+
+def hist_spec(values, path, title, xlabel, bins=40, kde=True, figsize=(8, 5)):
+    v = _finite(values)
+    counts, edges = np.histogram(v, bins=bins)
+    spec = {'kind': 'hist', 'path': path, 'title': title, 'xlabel': xlabel, 'figsize': figsize,
+            'counts': counts, 'edges': edges}
+    if kde and len(v) > 1 and v.std() > 0:
+        # Scott's rule, as in seaborn/scipy; the fine grid is padded by KDE_CUT bandwidths
+        bw = float(v.std(ddof=1) * len(v) ** (-1 / 5))
+        fine, fine_edges = np.histogram(v, bins=KDE_GRID, range=(v.min() - KDE_CUT * bw, v.max() + KDE_CUT * bw))
+        spec.update({'kde_counts': fine, 'kde_edges': fine_edges, 'kde_bw': bw,
+                     'kde_range': (float(v.min()), float(v.max()))})
+    return spec
+
+def lines_spec(series, path, title, xlabel, ylabel, figsize=(9, 5)):
+    # series: list of (label or None, x, y)
+    return {'kind': 'lines', 'path': path, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'figsize': figsize,
+            'series': [(label, np.asarray(x), np.asarray(y, dtype=float)) for label, x, y in series]}
+
+def scatter_spec(x, y, path, title, xlabel, ylabel, figsize=(7, 6)):
+    return {'kind': 'scatter', 'path': path, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'figsize': figsize,
+            'x': np.asarray(x, dtype=float), 'y': np.asarray(y, dtype=float)}
+
+def bar_spec(x, height, path, title, xlabel, ylabel, colors=None, horizontal=False, figsize=(10, 5)):
+    return {'kind': 'barh' if horizontal else 'bar', 'path': path, 'title': title, 'xlabel': xlabel,
+            'ylabel': ylabel, 'figsize': figsize, 'x': np.asarray(x), 'height': np.asarray(height, dtype=float),
+            'colors': colors}
+
+def heatmap_spec(matrix, labels, path, title, figsize=(8, 6)):
+    return {'kind': 'heatmap', 'path': path, 'title': title, 'figsize': figsize,
+            'matrix': np.asarray(matrix, dtype=float), 'labels': [str(c) for c in labels]}
+
+def binned_kde(counts, edges, bw):
+    # Gaussian KDE from a fine histogram: density on the bin centres via FFT convolution.
+    m = len(counts)
+    dx = edges[1] - edges[0]
+    offsets = np.arange(-(m - 1), m) * dx
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2) / (bw * np.sqrt(2 * np.pi))
+    size = 1 << int(np.ceil(np.log2(3 * m)))
+    conv = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)[m - 1:2 * m - 1]
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, np.maximum(conv, 0.0) / max(counts.sum(), 1)
+
+def _hash_value(h, v):
+    if isinstance(v, np.ndarray):
+        h.update(str((v.dtype.str, v.shape)).encode('utf-8'))
+        h.update(np.ascontiguousarray(v).tobytes())
+    elif isinstance(v, (list, tuple)):
+        h.update(b'[')
+        for it in v:
+            _hash_value(h, it)
+        h.update(b']')
+    else:
+        h.update(repr(v).encode('utf-8'))
+
+def spec_hash(spec):
+    h = hashlib.md5(str(RENDER_VERSION).encode('utf-8'))
+    for k in sorted(spec):
+        h.update(k.encode('utf-8'))
+        _hash_value(h, spec[k])
+    return h.hexdigest()
+
+def draw(spec):
+    import matplotlib.pyplot as plt
+    kind = spec['kind']
+    plt.figure(figsize=spec['figsize'])
+    if kind == 'hist':
+        edges = spec['edges']
+        plt.bar(edges[:-1], spec['counts'], width=np.diff(edges), align='edge', color='C0', alpha=0.75, edgecolor='white', linewidth=0.5)
+        if 'kde_counts' in spec:
+            x, dens = binned_kde(spec['kde_counts'], spec['kde_edges'], spec['kde_bw'])
+            lo, hi = spec['kde_range']
+            keep = (x >= lo) & (x <= hi)
+            plt.plot(x[keep], dens[keep] * spec['counts'].sum() * (edges[1] - edges[0]), color='C0')
+        plt.ylabel('Count')
+    elif kind == 'lines':
+        for label, x, y in spec['series']:
+            plt.plot(x, y, label=label)
+        if any(label for label, _, _ in spec['series']):
+            plt.legend()
+    elif kind == 'scatter':
+        plt.scatter(spec['x'], spec['y'], s=12, alpha=0.8, edgecolors='white', linewidths=0.3)
+    elif kind == 'bar':
+        plt.bar(spec['x'], spec['height'], color=spec['colors'])
+    elif kind == 'barh':
+        pos = np.arange(len(spec['x']))
+        plt.barh(pos, spec['height'], color=spec['colors'])
+        plt.yticks(pos, [str(v) for v in spec['x']])
+        plt.gca().invert_yaxis()
+    elif kind == 'heatmap':
+        n = len(spec['labels'])
+        plt.imshow(spec['matrix'], cmap='viridis', aspect='auto')
+        plt.colorbar()
+        plt.xticks(range(n), spec['labels'], rotation=90)
+        plt.yticks(range(n), spec['labels'])
+    else:
+        raise ValueError(f"Unknown figure kind: {kind}")
+    plt.title(spec['title'])
+    if spec.get('xlabel'):
+        plt.xlabel(spec['xlabel'])
+    if spec.get('ylabel'):
+        plt.ylabel(spec['ylabel'])
+    plt.tight_layout()
+
+def _render_one(spec):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    draw(spec)
+    plt.savefig(spec['path'])
+    plt.close()
+    return spec['path']
+
+def _read_index(d):
+    p = os.path.join(d, INDEX_NAME)
+    if not os.path.exists(p):
+        return {}
+    with open(p, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_index(d, index):
+    with open(os.path.join(d, INDEX_NAME), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+
+def render(specs, workers=None, force=False):
+    # Renders the queued specs; returns (rendered paths, skipped paths).
+    hashes = [spec_hash(s) for s in specs]
+    indexes = {}
+    todo, skipped = [], []
+    for s, h in zip(specs, hashes):
+        d = os.path.dirname(s['path']) or '.'
+        if d not in indexes:
+            indexes[d] = _read_index(d)
+        name = os.path.basename(s['path'])
+        if not force and indexes[d].get(name) == h and os.path.exists(s['path']):
+            skipped.append(s['path'])
+        else:
+            todo.append((s, h))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(todo)))
+    if workers == 1:
+        rendered = [_render_one(s) for s, _ in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render_one, [s for s, _ in todo]))
+    for s, h in todo:
+        d = os.path.dirname(s['path']) or '.'
+        indexes[d][os.path.basename(s['path'])] = h
+    for d in {os.path.dirname(s['path']) or '.' for s, _ in todo}:
+        _write_index(d, indexes[d])
+    return rendered, skipped
+
+def show(spec):
+    # Interactive path: draw in this process and open the window
+    import matplotlib.pyplot as plt
+    draw(spec)
+    plt.savefig(spec['path'])
+    plt.show()
+    plt.close()
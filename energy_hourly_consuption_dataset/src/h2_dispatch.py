@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+# Hourly electrolyzer dispatch with min load, ramp limits, H2 storage and a daily
+# offtake. Rolling horizon of one day: each day is planned from the storage level
+# left by the previous one, filling the cheapest hours (lowest load_total) first,
+# then an hourly pass enforces ramp/min-load/storage on the plan.
+# Every transition, shutdown included, stays within the ramp limit: the hourly
+# upper bound is tightened backwards so the unit ramps down ahead of hours it
+# cannot run. Hours without a PV limit (pv_kw missing, e.g. outside the meteo
+# window) run against the full capacity, as in estimate_h2_potential. Days
+# without any load data are skipped: no offtake, no production, no unmet demand.
+
+DEFAULTS = {
+    'min_load_frac': 0.2,
+    'ramp_frac_per_h': 0.5,
+    'storage_kg': 4000.0,
+    'storage_initial_frac': 0.5,
+    'storage_target_frac': 0.5,
+    'daily_target_kg': 3000.0,
+}
+
+def dispatch_params(cfg):
+    p = dict(DEFAULTS)
+    p.update({k: v for k, v in (cfg or {}).items() if k in DEFAULTS})
+    return p
+
+def day_bounds(dt):
+    day = dt.values.astype('datetime64[D]')
+    cut = np.flatnonzero(day[1:] != day[:-1]) + 1
+    return np.concatenate([[0], cut]), np.concatenate([cut, [len(day)]])
+
+def plan_day(avail, cost, energy_kwh, p_min):
+    # Cheapest hours first; the marginal hour is topped up to p_min if it runs.
+    plan = np.zeros(len(avail))
+    if energy_kwh <= 0:
+        return plan
+    order = np.argsort(cost, kind='stable')
+    cum = np.cumsum(avail[order])
+    k = int(np.searchsorted(cum, energy_kwh))
+    plan[order[:k]] = avail[order[:k]]
+    if k < len(order):
+        rest = energy_kwh - (cum[k - 1] if k else 0.0)
+        plan[order[k]] = max(rest, p_min) if rest > 0 else 0.0
+    return plan
+
+def ramp_bounds(avail, ramp, p_min):
+    # Highest setpoint per hour from which every later hour stays reachable:
+    # u[i] = min_j (avail[j] + ramp * (j - i)), and values below p_min mean off.
+    u = np.asarray(avail, dtype=float)
+    if ramp < p_min:
+        return np.zeros_like(u)  # cannot start from zero
+    idx = np.arange(len(u)) * ramp
+    while True:
+        u_next = np.minimum.accumulate((u + idx)[::-1])[::-1] - idx
+        u_next = np.where(u_next < p_min, 0.0, u_next)
+        if np.array_equal(u_next, u):
+            return u
+        u = u_next
+
+def dispatch(df, capacity_mw, kwh_per_kg, cfg=None):
+    p = dispatch_params(cfg)
+    d = df.sort_values('Datetime', kind='stable').reset_index(drop=True)
+    cap_kw = float(capacity_mw) * 1000.0
+    kwh_per_kg = float(kwh_per_kg)
+    p_min = p['min_load_frac'] * cap_kw
+    ramp = p['ramp_frac_per_h'] * cap_kw
+    store_cap = float(p['storage_kg'])
+    level_target = p['storage_target_frac'] * store_cap
+    load = pd.to_numeric(d['load_total'], errors='coerce').values.astype(float)
+    if 'kw_available' in d.columns:
+        avail = np.asarray(d['kw_available'], dtype=float)
+        if 'pv_kw' in d.columns:
+            no_pv = np.isnan(np.asarray(d['pv_kw'], dtype=float))
+        else:
+            no_pv = np.ones(len(d), dtype=bool)
+        avail = np.where(np.isnan(avail) & no_pv, cap_kw, avail)
+    else:
+        avail = np.full(len(d), cap_kw)
+    has_data = ~np.isnan(load) & ~np.isnan(avail)
+    if len(d) and not has_data.any():
+        raise ValueError('dispatch: nenhuma hora com carga e disponibilidade; '
+                         'as janelas de carga e meteorologia não se sobrepõem')
+    starts, ends = day_bounds(d['Datetime'])
+    active = np.zeros(len(d), dtype=bool)
+    for a, b in zip(starts, ends):
+        active[a:b] = has_data[a:b].any()
+    avail = np.where(~has_data | ~(avail >= p_min), 0.0, np.minimum(avail, cap_kw))
+    avail = ramp_bounds(avail, ramp, p_min)
+    cost = np.where(has_data, load, np.inf)
+    demand_h = float(p['daily_target_kg']) / 24.0
+    setpoint = np.zeros(len(d))
+    storage = np.zeros(len(d))
+    unmet = np.zeros(len(d))
+    spill = np.zeros(len(d))
+    level = p['storage_initial_frac'] * store_cap
+    prev = 0.0
+    for a, b in zip(starts, ends):
+        if not active[a]:
+            storage[a:b] = level
+            prev = 0.0
+            continue
+        need_kg = demand_h * (b - a) + (level_target - level)
+        plan = plan_day(avail[a:b], cost[a:b], need_kg * kwh_per_kg, p_min).tolist()
+        av = avail[a:b].tolist()
+        for i in range(b - a):
+            room = (store_cap - level + demand_h) * kwh_per_kg
+            x = min(plan[i], av[i], room, prev + ramp)
+            if x < p_min:
+                x = 0.0
+            if x < prev - ramp:
+                # ramp-down limit wins over the plan and the storage room
+                x = max(prev - ramp, p_min)
+            level += x / kwh_per_kg - demand_h
+            if level < 0:
+                unmet[a + i] = -level
+                level = 0.0
+            elif level > store_cap:
+                spill[a + i] = level - store_cap
+                level = store_cap
+            setpoint[a + i] = x
+            storage[a + i] = level
+            prev = x
+    d['h2_kw'] = setpoint
+    d['h2_kg'] = setpoint / kwh_per_kg
+    if 'co2e_kg_per_kg' in d.columns:
+        d['h2_co2e_kg'] = d['h2_kg'] * d['co2e_kg_per_kg']
+    d['storage_kg'] = storage
+    d['unmet_kg'] = unmet
+    d['spill_kg'] = spill
+    d['dispatch_active'] = active
+    return d
+
+def summarize_dispatch(res, capacity_mw, cfg=None):
+    p = dispatch_params(cfg)
+    on = res['h2_kw'] > 0
+    load = pd.to_numeric(res['load_total'], errors='coerce')
+    hours = int(res['dispatch_active'].sum())
+    return {
+        'hours_on': int(on.sum()),
+        'hours_dispatched': hours,
+        'h2_total_kg': float(res['h2_kg'].sum()),
+        'unmet_kg': float(res['unmet_kg'].sum()),
+        'spill_kg': float(res['spill_kg'].sum()),
+        'capacity_factor': float(res['h2_kw'].sum() / (float(capacity_mw) * 1000.0 * max(hours, 1))),
+        'load_ratio_on': float(load[on].mean() / load.mean()) if on.any() else float('nan'),
+        'storage_final_kg': float(res['storage_kg'].iloc[-1]) if len(res) else 0.0,
+        'daily_target_kg': float(p['daily_target_kg']),
+        'storage_kg': float(p['storage_kg']),
+    }
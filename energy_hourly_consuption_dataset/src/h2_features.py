@@ -1,18 +1,104 @@
+from bisect import bisect_left, insort
 import numpy as np
 import pandas as pd
+try:
+    from src import calendar_features
+except ImportError:
+    import calendar_features
 
 def add_calendar(df):
     d = df.copy()
-    d['hora'] = d['Datetime'].dt.hour
-    d['dia_semana'] = d['Datetime'].dt.dayofweek
-    d['mes'] = d['Datetime'].dt.month
+    cal = calendar_features.calendar_arrays(d['Datetime'])
+    d['hora'] = cal['hour']
+    d['dia_semana'] = cal['dayofweek']
+    d['mes'] = cal['month']
     return d
 
-def compute_offpeak_flags(df, percentile):
+def _lerp(a, b, t):
+    # Same rounding as numpy's 'linear' percentile method
+    d = b - a
+    return np.where(t >= 0.5, b - d * (1.0 - t), a + d * t)
+
+def rolling_percentile(t, values, percentile, window):
+    # Percentile of the trailing window (t - window, t], NaNs skipped. The window is
+    # kept as a sorted list (bisect insert/delete), so each step is O(log w) search
+    # plus a memmove, instead of re-sorting the window every hour.
+    t = np.asarray(t, dtype=np.int64).tolist()
+    vals = np.asarray(values, dtype=float).tolist()
+    q = float(percentile) / 100.0
+    out = np.full(len(vals), np.nan)
+    win = []
+    j = 0
+    for i, v in enumerate(vals):
+        if v == v:
+            insort(win, v)
+        lim = t[i] - window
+        while t[j] <= lim:
+            u = vals[j]
+            if u == u:
+                del win[bisect_left(win, u)]
+            j += 1
+        m = len(win)
+        if m:
+            r = q * (m - 1)
+            lo = int(r)
+            f = r - lo
+            if f and lo + 1 < m:
+                a, b = win[lo], win[lo + 1]
+                out[i] = b - (b - a) * (1.0 - f) if f >= 0.5 else a + (b - a) * f
+            else:
+                out[i] = win[lo]
+    return out
+
+def group_percentile(codes, values, percentile):
+    # nanpercentile per group code in one lexsort; NaNs sort to the end of each group
+    codes = np.asarray(codes)
+    values = np.asarray(values, dtype=float)
+    _, codes = np.unique(codes, return_inverse=True)
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    order = np.lexsort((values, codes))
+    sv = values[order]
+    size = np.bincount(codes, minlength=n_groups)
+    cnt = np.bincount(codes[~np.isnan(values)], minlength=n_groups)
+    start = np.concatenate([[0], np.cumsum(size)[:-1]])
+    r = float(percentile) / 100.0 * np.maximum(cnt - 1, 0)
+    lo = np.floor(r).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(cnt - 1, 0))
+    a = sv[np.minimum(start + lo, len(sv) - 1)]
+    b = sv[np.minimum(start + hi, len(sv) - 1)]
+    thr = np.where(cnt > 0, _lerp(a, b, r - lo), np.nan)
+    return thr[codes]
+
+def season_key(dt):
+    # (year, season) with December counted in the following year's winter
+    cal = calendar_features.calendar_arrays(dt)
+    year = cal['year'].astype(np.int64) + (cal['month'] == 12)
+    return year * 4 + cal['season']
+
+def offpeak_thresholds(df, percentile, mode='global', window_days=30):
+    s = pd.to_numeric(df['load_total'], errors='coerce').values.astype(float)
+    if mode == 'global':
+        return np.full(len(s), float(np.nanpercentile(s, percentile)))
+    if mode == 'rolling':
+        t = df['Datetime'].values.astype('datetime64[s]').astype(np.int64)
+        order = np.argsort(t, kind='stable')
+        thr = np.empty(len(s))
+        thr[order] = rolling_percentile(t[order], s[order], percentile, int(window_days * 86400))
+        return thr
+    if mode == 'month':
+        cal = calendar_features.calendar_arrays(df['Datetime'])
+        return group_percentile(cal['year'].astype(np.int64) * 12 + cal['month'], s, percentile)
+    if mode == 'season':
+        return group_percentile(season_key(df['Datetime']), s, percentile)
+    raise ValueError(f'offpeak mode desconhecido: {mode}')
+
+def compute_offpeak_flags(df, percentile, mode='global', window_days=30):
+    # mode: 'global' (whole history), 'rolling' (trailing window_days),
+    # 'month' (per year-month) or 'season' (per year-season)
     s = pd.to_numeric(df['load_total'], errors='coerce')
-    thr = float(np.nanpercentile(s.values, percentile))
-    df['offpeak'] = s <= thr
-    df['thr_load'] = thr
+    thr = offpeak_thresholds(df, percentile, mode, window_days)
+    df['offpeak'] = s.values <= thr
+    df['thr_load'] = thr if mode != 'global' else float(thr[0]) if len(thr) else np.nan
     return df
 
 def estimate_h2_potential(df, capacity_mw, kwh_per_kg, emission_factor_kg_per_kwh, pv_coeff_mw_per_wm2=None):
@@ -33,3 +119,49 @@ def estimate_h2_potential(df, capacity_mw, kwh_per_kg, emission_factor_kg_per_kw
     d['co2e_kg_per_kg'] = float(emission_factor_kg_per_kwh) * float(kwh_per_kg)
     d['h2_co2e_kg'] = d['h2_kg'] * d['co2e_kg_per_kg']
     return d
+
+def scenario_grid(**params):
+    # Cartesian product of parameter lists -> one row per scenario
+    idx = pd.MultiIndex.from_product([np.atleast_1d(v) for v in params.values()], names=list(params))
+    return idx.to_frame(index=False)
+
+def estimate_h2_scenarios(df, capacity_mw, kwh_per_kg, offpeak_percentile, emission_factor_kg_per_kwh, pv_coeff_mw_per_wm2=None, chunk_bytes=64 * 2**20):
+    # Batch version of compute_offpeak_flags + estimate_h2_potential. Parameters are
+    # broadcast to S scenarios (NaN pv coeff = no PV limit). Hours are sorted by load
+    # once, so each scenario's off-peak set is a prefix found by searchsorted; only
+    # PV-limited scenarios need the (S x hours) grid, evaluated in chunks of
+    # scenarios bounded by chunk_bytes.
+    pv = np.nan if pv_coeff_mw_per_wm2 is None else pv_coeff_mw_per_wm2
+    cap, kwh, pct, ef, pv = [np.atleast_1d(np.asarray(a, dtype=float)).ravel() for a in np.broadcast_arrays(capacity_mw, kwh_per_kg, offpeak_percentile, emission_factor_kg_per_kwh, pv)]
+    load = pd.to_numeric(df['load_total'], errors='coerce').values.astype(float)
+    upct, inv = np.unique(pct, return_inverse=True)
+    thr = np.atleast_1d(np.nanpercentile(load, upct))[inv]
+    valid = ~np.isnan(load)
+    order = np.argsort(load[valid], kind='stable')
+    hours = np.searchsorted(load[valid][order], thr, 'right')
+    kw_total = hours * cap * 1000.0
+    has_pv = ~np.isnan(pv)
+    if 'irradiance_wm2' in df.columns and has_pv.any():
+        irr = df['irradiance_wm2'].values.astype(float)[valid][order]
+        pos = np.arange(len(irr))
+        rows = np.flatnonzero(has_pv)
+        step = max(1, int(chunk_bytes // (8 * max(len(irr), 1))))
+        for i in range(0, len(rows), step):
+            r = rows[i:i + step]
+            kw = np.minimum(irr[None, :] * pv[r, None] * 1000.0, cap[r, None] * 1000.0)
+            kw_total[r] = np.nansum(np.where(pos[None, :] < hours[r, None], kw, 0.0), axis=1)
+    h2_kg = kw_total / kwh
+    co2e_kg_per_kg = ef * kwh
+    return pd.DataFrame({
+        'capacity_mw': cap,
+        'kwh_per_kg': kwh,
+        'offpeak_percentile': pct,
+        'emission_factor_kg_per_kwh': ef,
+        'pv_coeff_mw_per_wm2': pv,
+        'thr_load': thr,
+        'hours_offpeak': hours,
+        'h2_kwh_total': kw_total,
+        'h2_kg_total': h2_kg,
+        'co2e_kg_per_kg': co2e_kg_per_kg,
+        'h2_co2e_kg_total': h2_kg * co2e_kg_per_kg,
+    })
@@ -1,18 +1,14 @@
-import os
+import numpy as np
 import pandas as pd
+try:
+    from src import dataset_cache
+    from src import zone_matrix
+except ImportError:
+    import dataset_cache
+    import zone_matrix
 
 def load_integrated(root):
-    p1 = os.path.join(root, 'data', 'processed', 'pjm_integrated.csv')
-    p2 = os.path.join(root, 'data', 'processed', 'pjm_dataset.csv')
-    if os.path.exists(p1):
-        df = pd.read_csv(p1, low_memory=False)
-    elif os.path.exists(p2):
-        df = pd.read_csv(p2, low_memory=False)
-    else:
-        raise FileNotFoundError('Integrated dataset not found')
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df = df.dropna(subset=['Datetime']).sort_values('Datetime')
-    return df
+    return dataset_cache.load_integrated(root)
 
 def select_load(df):
     cols = [c for c in df.columns if c not in ['Datetime']]
@@ -23,3 +19,10 @@ def select_load(df):
     out = pd.DataFrame({'Datetime': df['Datetime'], 'load_total': s})
     return out
 
+def select_load_matrix(m):
+    # Same rule as select_load, reading zone slices straight from the memmap matrix
+    if 'PJM_Load' in m['zones']:
+        s = zone_matrix.zone_view(m, 'PJM_Load')
+    else:
+        s = np.nansum(m['values'], axis=0)
+    return pd.DataFrame({'Datetime': zone_matrix.hourly_index(m), 'load_total': s}, copy=False)
@@ -21,11 +21,29 @@ def write_report(path, params, summary):
     lines.append(f"Capacidade do eletrolisador: {params['capacity_mw']} MW")
     lines.append(f"Eficiência: {params['kwh_per_kg']} kWh/kg")
     lines.append(f"Percentil off-peak: {params['offpeak_percentile']}%")
+    mode = params.get('offpeak_mode', 'global')
+    if mode == 'rolling':
+        mode = f"rolling ({params.get('offpeak_window_days', 30)} dias)"
+    lines.append(f"Limiar off-peak: {mode}")
     lines.append('')
     lines.append('## Sumário')
-    lines.append(f"Horas off-peak: {summary['hours_offpeak']}")
+    if 'dispatch' in summary:
+        lines.append(f"Horas em operação (despacho): {summary['hours_offpeak']}")
+    else:
+        lines.append(f"Horas off-peak: {summary['hours_offpeak']}")
     lines.append(f"H2 total estimado (kg): {summary['h2_total_kg']:.2f}")
     lines.append(f"CO2e por kg estimado (kg/kg): {summary['co2e_kg_per_kg']:.3f}")
+    if 'dispatch' in summary:
+        d = summary['dispatch']
+        lines.append('')
+        lines.append('## Despacho (mín. carga, rampa, armazenamento)')
+        lines.append(f"Meta diária (kg): {d['daily_target_kg']:.0f} | Armazenamento (kg): {d['storage_kg']:.0f}")
+        lines.append(f"Horas em operação: {d['hours_on']} de {d['hours_dispatched']} com dados de carga e disponibilidade")
+        lines.append(f"Fator de capacidade: {d['capacity_factor']:.3f}")
+        lines.append(f"Carga média nas horas de operação / média geral: {d['load_ratio_on']:.3f}")
+        lines.append(f"Demanda não atendida (kg): {d['unmet_kg']:.2f}")
+        lines.append(f"Armazenamento final (kg): {d['storage_final_kg']:.2f}")
+        lines.append(f"Excedente descartado com armazenamento cheio (kg): {d['spill_kg']:.2f}")
     lines.append('')
     lines.append('## Observações')
     lines.append('Resultados dependem de parâmetros; preços e emissões reais devem ser integrados para LCOH e intensidade de carbono certificável.')
@@ -1,8 +1,17 @@
 import os
+import io
 import hashlib
 import json
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
 import pandas as pd
 
+TAIL_BYTES = 4096
+CHUNK_BYTES = 1 << 20
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+LOCAL_TZ = 'America/New_York'
+
 def md5_file(path):
     h = hashlib.md5()
     with open(path, 'rb') as f:
@@ -10,6 +19,130 @@ def md5_file(path):
             h.update(chunk)
     return h.hexdigest()
 
+def md5_range(path, offset, size):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        left = size
+        while left > 0:
+            chunk = f.read(min(1 << 20, left))
+            if not chunk:
+                break
+            h.update(chunk)
+            left -= len(chunk)
+    return h.hexdigest()
+
+def tail_md5(path, size):
+    start = max(0, size - TAIL_BYTES)
+    return md5_range(path, start, size - start)
+
+def chain_md5(segments):
+    # Hash of the segment hashes, stored next to the real file md5: equal to the
+    # whole-file md5 while the file has a single segment, and changes whenever
+    # any segment does once rows have been appended.
+    if len(segments) == 1:
+        return segments[0]['md5']
+    text = ','.join(s['md5'] for s in segments)
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+def manifest_entry(root, path, md5=None):
+    size = os.path.getsize(path)
+    md5 = md5 or md5_file(path)
+    return {
+        'file': os.path.relpath(path, root),
+        'size': size,
+        'md5': md5,
+        'chain_md5': md5,
+        'segments': [{'offset': 0, 'size': size, 'md5': md5}],
+        'tail_md5': tail_md5(path, size),
+    }
+
+def _manifest_path(root):
+    return os.path.join(root, 'data', 'manifest.json')
+
+def _write_manifest_items(root, items):
+    man = {
+        'root': root,
+        'files': items,
+    }
+    out = _manifest_path(root)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(man, f, indent=2)
+    return out
+
+def read_manifest_entries(root):
+    path = _manifest_path(root)
+    if not os.path.exists(path):
+        return {}, None
+    with open(path, 'r', encoding='utf-8') as f:
+        items = {it['file'].replace('\\', '/'): it for it in json.load(f).get('files', [])}
+    return items, os.path.getmtime(path)
+
+def segments_match(path, segments):
+    # True when every recorded segment still hashes the same (legacy entries whose
+    # md5 field held the chain hash are verified this way).
+    return all(md5_range(path, seg['offset'], seg['size']) == seg['md5'] for seg in segments)
+
+def refresh_manifest(root, files, md5s=None):
+    # Updates manifest.json reading only what changed. A file that grew and whose
+    # previous last TAIL_BYTES are intact is treated as append-only: only the new
+    # bytes are hashed and recorded as a segment, and chain_md5/tail_md5 carry the
+    # change signal. The whole-file md5 is deferred (None) until a full read
+    # supplies it (md5s: path -> md5, e.g. from basic_checks in main). Anything
+    # else is re-hashed; a file whose content did not change keeps its entry and
+    # segments.
+    md5s = md5s or {}
+    old, man_mtime = read_manifest_entries(root)
+    items = []
+    changes = {}
+    for p in files:
+        key = os.path.relpath(p, root).replace('\\', '/')
+        st = os.stat(p)
+        prev = old.get(key)
+        if prev is None:
+            status = 'new'
+            entry = manifest_entry(root, p, md5s.get(p))
+        elif prev['size'] == st.st_size and man_mtime is not None and st.st_mtime <= man_mtime and 'tail_md5' in prev:
+            status = 'unchanged'
+            entry = dict(prev, file=os.path.relpath(p, root))
+            if 'chain_md5' not in entry:
+                # older manifests kept the chain hash in md5 after an append
+                entry['chain_md5'] = chain_md5(entry.get('segments') or [entry])
+                if len(entry.get('segments', [])) > 1:
+                    entry['md5'] = None
+            if md5s.get(p):
+                entry['md5'] = md5s[p]
+        elif st.st_size > prev['size'] and prev.get('tail_md5') == tail_md5(p, prev['size']):
+            status = 'appended'
+            added = st.st_size - prev['size']
+            segments = prev.get('segments') or [{'offset': 0, 'size': prev['size'], 'md5': prev['md5']}]
+            segments = segments + [{'offset': prev['size'], 'size': added, 'md5': md5_range(p, prev['size'], added)}]
+            entry = {
+                'file': os.path.relpath(p, root),
+                'size': st.st_size,
+                'md5': md5s.get(p),
+                'chain_md5': chain_md5(segments),
+                'segments': segments,
+                'tail_md5': tail_md5(p, st.st_size),
+            }
+        else:
+            entry = manifest_entry(root, p, md5s.get(p))
+            if prev.get('md5') and ('chain_md5' in prev or len(prev.get('segments', [])) < 2):
+                same = entry['size'] == prev['size'] and entry['md5'] == prev['md5']
+            else:
+                # md5 deferred after an append, or a legacy chain hash
+                same = entry['size'] == prev['size'] and segments_match(p, prev['segments'])
+            if same:
+                status = 'unchanged'
+                entry = dict(prev, file=os.path.relpath(p, root), md5=entry['md5'], tail_md5=entry['tail_md5'])
+                entry.setdefault('chain_md5', chain_md5(entry.get('segments') or [entry]))
+            else:
+                status = 'rewritten'
+        items.append(entry)
+        changes[key] = {'status': status, 'offset': prev['size'] if prev else 0, 'size': st.st_size}
+    out = _write_manifest_items(root, items)
+    return out, changes
+
 def list_raw_files(root):
     raw = os.path.join(root, 'data', 'raw')
     files = []
@@ -18,37 +151,111 @@ def list_raw_files(root):
             files.append(os.path.join(raw, name))
     return files
 
-def basic_checks(path):
-    df = pd.read_csv(path, nrows=5000)
-    cols = list(df.columns)
-    ok_datetime = 'Datetime' in cols
-    n_rows = len(df)
-    dups = int(df.duplicated(subset=['Datetime']).sum()) if ok_datetime else None
-    miss = {c: int(df[c].isna().sum()) for c in cols}
+def _is_dst_transition(hour, tz):
+    # Stamps are local hour-ending, so a DST gap/duplicate lands next to the switch:
+    # flag hours where the UTC offset differs 3h before and 3h after.
+    t = datetime(1970, 1, 1) + timedelta(hours=int(hour))
+    before = (t - timedelta(hours=3)).replace(tzinfo=tz).utcoffset()
+    after = (t + timedelta(hours=3)).replace(tzinfo=tz).utcoffset()
+    return before != after
+
+def hour_grid_stats(base, counts):
+    stats = {'first': None, 'last': None, 'duplicated_by_datetime': 0, 'missing_hours': 0, 'gaps': 0,
+             'dst_missing': 0, 'dst_duplicated': 0}
+    if counts is None or not counts.any():
+        return stats
+    filled = np.flatnonzero(counts)
+    off = base + int(filled[0])
+    grid = counts[filled[0]:filled[-1] + 1]
+    empty = grid == 0
+    stats['first'] = str(pd.Timestamp(off * 3600, unit='s'))
+    stats['last'] = str(pd.Timestamp((base + int(filled[-1])) * 3600, unit='s'))
+    stats['duplicated_by_datetime'] = int((grid[grid > 1] - 1).sum())
+    stats['missing_hours'] = int(empty.sum())
+    stats['gaps'] = int((empty[1:] & ~empty[:-1]).sum())
+    tz = ZoneInfo(LOCAL_TZ)
+    stats['dst_missing'] = sum(_is_dst_transition(off + h, tz) for h in np.flatnonzero(empty))
+    stats['dst_duplicated'] = sum(_is_dst_transition(off + h, tz) for h in np.flatnonzero(grid > 1))
+    return stats
+
+def _add_hours(grid, hours):
+    # grid = [base, counts]; counts is an hourly histogram that grows in either direction.
+    h0, h1 = int(hours.min()), int(hours.max())
+    base, counts = grid
+    if counts is None:
+        base, counts = h0, np.zeros(h1 - h0 + 1, dtype=np.int32)
+    if h0 < base:
+        counts = np.concatenate([np.zeros(base - h0, dtype=np.int32), counts])
+        base = h0
+    if h1 - base + 1 > len(counts):
+        counts = np.concatenate([counts, np.zeros(h1 - base + 1 - len(counts), dtype=np.int32)])
+    counts[h0 - base:h1 - base + 1] += np.bincount(hours - h0, minlength=h1 - h0 + 1).astype(np.int32)
+    grid[0], grid[1] = base, counts
+
+def _iter_line_blocks(f, h, chunk_bytes):
+    # Yields byte blocks that end on a line boundary; every byte read also feeds h.
+    rest = b''
+    while True:
+        block = f.read(chunk_bytes)
+        h.update(block)
+        if not block:
+            if rest.strip():
+                yield rest
+            return
+        data = rest + block
+        cut = data.rfind(b'\n') + 1
+        data, rest = data[:cut], data[cut:]
+        if data.strip():
+            yield data
+
+def basic_checks(path, chunk_bytes=CHUNK_BYTES):
+    # Single streaming pass over the whole file: the md5 is computed on the same
+    # bytes that are parsed, and memory is one chunk plus an hourly count grid.
+    h = hashlib.md5()
+    n_rows = 0
+    invalid_dt = 0
+    grid = [None, None]
+    with open(path, 'rb') as f:
+        header = f.readline()
+        h.update(header)
+        cols = header.decode('utf-8-sig').strip().split(',')
+        ok_datetime = 'Datetime' in cols
+        miss = {c: 0 for c in cols}
+        lo = {c: np.inf for c in cols if c != 'Datetime'}
+        hi = {c: -np.inf for c in cols if c != 'Datetime'}
+        for data in _iter_line_blocks(f, h, chunk_bytes):
+            df = pd.read_csv(io.BytesIO(data), header=None, names=cols, dtype={'Datetime': str} if ok_datetime else None)
+            n_rows += len(df)
+            for c in cols:
+                miss[c] += int(df[c].isna().sum())
+            for c in lo:
+                v = pd.to_numeric(df[c], errors='coerce').values.astype(np.float64)
+                if np.isfinite(v).any():
+                    lo[c] = min(lo[c], float(np.nanmin(v)))
+                    hi[c] = max(hi[c], float(np.nanmax(v)))
+            if ok_datetime:
+                dt = pd.to_datetime(df['Datetime'], format=DATETIME_FORMAT, errors='coerce')
+                invalid_dt += int((dt.isna() & df['Datetime'].notna()).sum())
+                hours = dt.dropna().values.astype('datetime64[h]').astype(np.int64)
+                if len(hours):
+                    _add_hours(grid, hours)
+    stats = hour_grid_stats(*grid) if ok_datetime else None
     return {
         'columns': cols,
         'has_datetime': ok_datetime,
-        'sample_rows': n_rows,
-        'duplicated_by_datetime': dups,
+        'rows': n_rows,
+        'duplicated_by_datetime': stats['duplicated_by_datetime'] if stats else None,
+        'invalid_datetime': invalid_dt if ok_datetime else None,
+        'hourly_grid': stats,
         'missing_counts': miss,
+        'min': {c: (v if np.isfinite(v) else None) for c, v in lo.items()},
+        'max': {c: (v if np.isfinite(v) else None) for c, v in hi.items()},
+        'md5': h.hexdigest(),
     }
 
 def write_manifest(root, files):
-    items = []
-    for p in files:
-        items.append({
-            'file': os.path.relpath(p, root),
-            'size': os.path.getsize(p),
-            'md5': md5_file(p),
-        })
-    man = {
-        'root': root,
-        'files': items,
-    }
-    out = os.path.join(root, 'data', 'manifest.json')
-    with open(out, 'w', encoding='utf-8') as f:
-        json.dump(man, f, indent=2)
-    return out
+    items = [manifest_entry(root, p) for p in files]
+    return _write_manifest_items(root, items)
 
 def write_quality_report(root, checks):
     lines = []
@@ -58,12 +265,20 @@ def write_quality_report(root, checks):
         lines.append(f"Arquivo: `{os.path.basename(item['file'])}`")
         lines.append(f"- Colunas: {', '.join(item['info']['columns'])}")
         lines.append(f"- Possui Datetime: {item['info']['has_datetime']}")
-        lines.append(f"- Linhas amostradas: {item['info']['sample_rows']}")
+        lines.append(f"- Linhas: {item['info']['rows']}")
         if item['info']['duplicated_by_datetime'] is not None:
-            lines.append(f"- Duplicatas por Datetime: {item['info']['duplicated_by_datetime']}")
-        lines.append("- Ausentes (amostra):")
+            g = item['info']['hourly_grid']
+            lines.append(f"- Período: {g['first']} a {g['last']}")
+            lines.append(f"- Datetime inválido: {item['info']['invalid_datetime']}")
+            lines.append(f"- Duplicatas por Datetime: {item['info']['duplicated_by_datetime']} (horário de verão: {g['dst_duplicated']})")
+            lines.append(f"- Horas ausentes: {g['missing_hours']} em {g['gaps']} lacunas (horário de verão: {g['dst_missing']})")
+        lines.append("- Ausentes:")
         for c, v in item['info']['missing_counts'].items():
             lines.append(f"  - {c}: {v}")
+        if item['info']['min']:
+            lines.append("- Mín / Máx:")
+            for c in item['info']['min']:
+                lines.append(f"  - {c}: {item['info']['min'][c]} / {item['info']['max'][c]}")
         lines.append('')
     out = os.path.join(root, 'reports', 'quality_report.md')
     with open(out, 'w', encoding='utf-8') as f:
@@ -77,7 +292,7 @@ def main():
     for p in files:
         info = basic_checks(p)
         checks.append({'file': p, 'info': info})
-    man = write_manifest(root, files)
+    man, _ = refresh_manifest(root, files, md5s={c['file']: c['info']['md5'] for c in checks})
     rep = write_quality_report(root, checks)
     print(man)
     print(rep)
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+try:
+    from src import calendar_features
+except ImportError:
+    import calendar_features
+
+# Error breakdowns for one or more models in a single pass: every (model, key)
+# cell is a flat integer code, and |res|, res² and counts come from np.bincount.
+# Calendar keys come from the shared calendar store, so datetimes are never re-parsed.
+
+KEYS = {'hora': 24, 'dia_semana': 7, 'mes': 12, 'feriado': 2}
+BREAKDOWNS = [('hora',), ('dia_semana',), ('mes',), ('feriado',), ('feriado', 'hora')]
+
+def _key_codes(cal):
+    return {
+        'hora': cal['hour'].astype(np.int64),
+        'dia_semana': cal['dayofweek'].astype(np.int64),
+        'mes': cal['month'].astype(np.int64) - 1,
+        'feriado': cal['holiday'].astype(np.int64),
+    }
+
+def error_breakdown(models, breakdowns=BREAKDOWNS):
+    # models: {name: (datetimes, residuals)}; each model may cover its own rows.
+    # Returns {'hora': frame, ..., 'feriado_hora': frame} with mae_/rmse_/n_<model> columns.
+    names = list(models)
+    dt = np.concatenate([np.asarray(models[m][0], dtype='datetime64[ns]') for m in names])
+    res = np.concatenate([np.asarray(models[m][1], dtype=float) for m in names])
+    model = np.repeat(np.arange(len(names)), [len(models[m][1]) for m in names])
+    ok = np.isfinite(res)
+    dt, res, model = dt[ok], res[ok], model[ok]
+    codes = _key_codes(calendar_features.calendar_arrays(dt))
+    absres, sqres = np.abs(res), res * res
+    out = {}
+    for keys in breakdowns:
+        shape = (len(names),) + tuple(KEYS[k] for k in keys)
+        flat = np.ravel_multi_index((model,) + tuple(codes[k] for k in keys), shape)
+        size = int(np.prod(shape))
+        n = np.bincount(flat, minlength=size).reshape(len(names), -1)
+        sa = np.bincount(flat, weights=absres, minlength=size).reshape(len(names), -1)
+        ss = np.bincount(flat, weights=sqres, minlength=size).reshape(len(names), -1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mae, rmse = sa / n, np.sqrt(ss / n)
+        index = pd.MultiIndex.from_product([range(KEYS[k]) for k in keys], names=list(keys))
+        if len(keys) == 1:
+            index = index.get_level_values(0)
+        cols = {}
+        for i, m in enumerate(names):
+            cols[f'mae_{m}'] = mae[i]
+            cols[f'rmse_{m}'] = rmse[i]
+            cols[f'n_{m}'] = n[i]
+        frame = pd.DataFrame(cols, index=index)
+        frame = frame[n.sum(axis=0) > 0]
+        if 'mes' in keys:
+            frame = frame.rename(index=lambda v: v + 1, level='mes' if len(keys) > 1 else None)
+        out['_'.join(keys)] = frame
+    return out
+
+def tidy(breakdown):
+    # Long format for CSV: one row per (breakdown, key, model)
+    rows = []
+    for name, frame in breakdown.items():
+        models = [c[4:] for c in frame.columns if c.startswith('mae_')]
+        for key, r in frame.iterrows():
+            for m in models:
+                rows.append({'quebra': name, 'chave': key, 'modelo': m,
+                             'mae': r[f'mae_{m}'], 'rmse': r[f'rmse_{m}'], 'n': int(r[f'n_{m}'])})
+    return pd.DataFrame(rows)
+
+def _groupby_breakdown(dt, res):
+    # Previous approach (DataFrame + datetime parse + groupby-apply per key), kept for the benchmark
+    d = pd.DataFrame({'Datetime': dt, 'res': res})
+    t = pd.to_datetime(d['Datetime'])
+    d['hora'], d['dia_semana'], d['mes'] = t.dt.hour, t.dt.dayofweek, t.dt.month
+    d['feriado'] = t.dt.normalize().isin(pd.to_datetime(calendar_features.holiday_days(), unit='D')).astype(int)
+    return {'_'.join(k): d.groupby(list(k))['res'].apply(lambda s: np.mean(np.abs(s))) for k in BREAKDOWNS}
+
+def main():
+    # Benchmark on the last AEP year: groupby-apply per key vs the one-pass breakdown.
+    root = os.getcwd()
+    sys.path.insert(0, root)
+    import mvp_energy
+    aep = mvp_energy.add_time_features(mvp_energy.load_series(os.path.join(root, 'data', 'raw', 'AEP_hourly.csv'), 'AEP_MW'))
+    df_time, X, y = mvp_energy.build_features(aep, 'AEP_MW')
+    ly, X_train, y_train, X_test, y_test = mvp_energy.split_train_test(df_time, X, y)
+    res = y_test - mvp_energy.predict_linear_regression(X_test, mvp_energy.fit_linear_regression(X_train, y_train))
+    dt = df_time['Datetime'].values[(df_time['Datetime'].dt.year == ly).values]
+    reps = 20
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        old = _groupby_breakdown(dt, res)
+    t_old = (time.perf_counter() - t0) / reps
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        calendar_features._store.clear()
+        new = error_breakdown({'v1': (dt, res)})
+    t_new = (time.perf_counter() - t0) / reps
+    same = all(np.allclose(old[k].values, new[k]['mae_v1'].values) for k in old)
+    print(f"AEP {ly}: {len(res)} test hours, {len(BREAKDOWNS)} breakdowns")
+    print(f"groupby-apply: {t_old * 1000:.2f} ms")
+    print(f"bincount:      {t_new * 1000:.2f} ms  (speedup {t_old / t_new:.1f}x, same MAE: {same})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import os
+import sys
+import numpy as np
+try:
+    from src import calendar_features
+    from src import data_prep
+except ImportError:
+    import calendar_features
+    import data_prep
+
+# Recursive least squares over the build_features_weekend layout:
+# [1, hora, dia_semana, mes, lag1, lag24, fim_semana, feriado]
+# Lags are taken by timestamp (t-1h, t-24h), so gaps give NaN instead of shifted values.
+# Forgetting is per hour of wall-clock time: a row's weight is forgetting ** (hours
+# since it was observed), in fit() and in update() alike, so gaps are discounted too.
+
+FEATURES = ['intercept', 'hora', 'dia_semana', 'mes', 'lag1', 'lag24', 'fim_semana', 'feriado']
+HOUR = 3600
+HIST = 24
+HOLIDAY_DAYS = tuple(int(np.datetime64(d, 'D').astype(np.int64))
+                     for d in (calendar_features.HOLIDAY_START, calendar_features.HOLIDAY_END))
+
+def _hour_features(hour_idx):
+    # Calendar part of one row from an hour index (hours since epoch)
+    day = hour_idx // 24
+    if not HOLIDAY_DAYS[0] <= day <= HOLIDAY_DAYS[1]:
+        raise ValueError(f'{np.datetime64(int(day), "D")} fora da tabela de feriados '
+                         f'({calendar_features.HOLIDAY_START} a {calendar_features.HOLIDAY_END})')
+    month = np.datetime64(int(day), 'D').astype('datetime64[M]').astype(np.int64) % 12 + 1
+    dow = (day + 3) % 7
+    hol = calendar_features.holiday_days()
+    i = np.searchsorted(hol, day)
+    holiday = bool(i < len(hol) and hol[i] == day)
+    return float(hour_idx % 24), float(dow), float(month), float(dow >= 5), float(holiday)
+
+def design_matrix(ts, values):
+    # Batch rows for sorted epoch seconds `ts`; lags are matched by timestamp.
+    ns = (np.asarray(ts, dtype=np.int64) * 10**9).astype('datetime64[ns]')
+    cal = calendar_features.calendar_arrays(ns)
+    v = np.asarray(values, dtype=float)
+    def lag(k):
+        target = ts - k * HOUR
+        j = np.clip(np.searchsorted(ts, target), 0, len(ts) - 1)
+        return np.where(ts[j] == target, v[j], np.nan)
+    return np.column_stack([np.ones(len(v)), cal['hour'], cal['dayofweek'], cal['month'], lag(1), lag(24),
+                            cal['weekend'], cal['holiday']])
+
+class RLSForecaster:
+    def __init__(self, forgetting=0.999, delta=1e4, scale=None):
+        p = len(FEATURES)
+        self.forgetting = float(forgetting)
+        self.scale = np.ones(p) if scale is None else np.asarray(scale, dtype=float)
+        self.beta = np.zeros(p)
+        self.P = np.eye(p) * delta
+        self.hist = np.full(HIST, np.nan)
+        self.hist_hour = np.full(HIST, -1, dtype=np.int64)
+        self.last_hour = None
+        self.fit_hour = None  # hour of the newest row in beta/P, the reference for forgetting
+        self.n_updates = 0
+
+    def _lag(self, hour_idx, k):
+        h = hour_idx - k
+        return self.hist[h % HIST] if self.hist_hour[h % HIST] == h else np.nan
+
+    def _row(self, hour_idx):
+        hora, dow, mes, fim, fer = _hour_features(hour_idx)
+        x = np.array([1.0, hora, dow, mes, self._lag(hour_idx, 1), self._lag(hour_idx, 24), fim, fer])
+        return x / self.scale
+
+    def _remember(self, hour_idx, y):
+        self.hist[hour_idx % HIST] = y
+        self.hist_hour[hour_idx % HIST] = hour_idx
+        self.last_hour = hour_idx if self.last_hour is None else max(self.last_hour, hour_idx)
+
+    def fit(self, ts, values):
+        # Warm start equal to running RLS over the whole history: exponentially
+        # weighted normal equations solved once, P = (Xᵀ W X)⁻¹.
+        ts = np.asarray(ts, dtype=np.int64)
+        v = np.asarray(values, dtype=float)
+        X = design_matrix(ts, v)
+        self.scale = np.maximum(np.nanmax(np.abs(X), axis=0), 1.0)
+        X = X / self.scale
+        ok = np.isfinite(X).all(axis=1) & np.isfinite(v)
+        hours = ts // HOUR
+        age = (hours.max() - hours)[ok]
+        w = self.forgetting ** age.astype(float)
+        Xo, vo = X[ok], v[ok]
+        xtx = (Xo * w[:, None]).T @ Xo
+        self.P = np.linalg.pinv(xtx)
+        self.beta = self.P @ ((Xo * w[:, None]).T @ vo)
+        self.n_updates = int(ok.sum())
+        self.fit_hour = int(hours[ok].max()) if ok.any() else None
+        for t, y in zip(ts[-HIST:], v[-HIST:]):
+            self._remember(int(t // HOUR), float(y))
+        return self
+
+    def update(self, ts, y):
+        # One hourly observation: returns the prediction made before seeing y.
+        # Cost O(p²); rows with a missing lag only refresh the lag history. Old
+        # rows are discounted once per hour elapsed since the last absorbed row.
+        hour_idx = int(ts // HOUR)
+        x = self._row(hour_idx)
+        y_hat = float(x @ self.beta) if np.isfinite(x).all() else np.nan
+        if np.isfinite(x).all() and np.isfinite(y):
+            gap = 1 if self.fit_hour is None else max(hour_idx - self.fit_hour, 0)
+            lam = self.forgetting ** gap
+            Px = self.P @ x
+            k = Px / (lam + x @ Px)
+            self.beta = self.beta + k * (y - x @ self.beta)
+            self.P = (self.P - np.outer(k, Px)) / lam
+            self.P = (self.P + self.P.T) / 2.0
+            self.n_updates += 1
+            self.fit_hour = hour_idx if self.fit_hour is None else max(self.fit_hour, hour_idx)
+        self._remember(hour_idx, y)
+        return y_hat
+
+    def predict_next(self):
+        if self.last_hour is None:
+            return None, np.nan
+        nxt = self.last_hour + 1
+        x = self._row(nxt)
+        y_hat = float(x @ self.beta) if np.isfinite(x).all() else np.nan
+        return nxt * HOUR, y_hat
+
+    def coefficients(self):
+        # Coefficients on the unscaled feature layout
+        return dict(zip(FEATURES, self.beta / self.scale))
+
+    def save(self, path):
+        np.savez(path, forgetting=self.forgetting, scale=self.scale, beta=self.beta, P=self.P,
+                 hist=self.hist, hist_hour=self.hist_hour,
+                 last_hour=-1 if self.last_hour is None else self.last_hour,
+                 fit_hour=-1 if self.fit_hour is None else self.fit_hour, n_updates=self.n_updates)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            m = cls(float(z['forgetting']), scale=z['scale'])
+            m.beta, m.P = z['beta'], z['P']
+            m.hist, m.hist_hour = z['hist'], z['hist_hour']
+            m.last_hour = None if int(z['last_hour']) < 0 else int(z['last_hour'])
+            fit_hour = int(z['fit_hour']) if 'fit_hour' in z.files else -1
+            m.fit_hour = None if fit_hour < 0 else fit_hour
+            m.n_updates = int(z['n_updates'])
+        return m
+
+def main():
+    # Warm start on every year before the last one, then stream the last year hour by hour.
+    root = os.getcwd()
+    zone = sys.argv[1] if len(sys.argv) > 1 else 'AEP'
+    _, ts, vals, _ = data_prep.parse_zone_file(os.path.join(root, 'data', 'raw', f'{zone}_hourly.csv'))
+    years = ts.astype('datetime64[s]').astype('datetime64[Y]').astype(np.int64) + 1970
+    cut = int(np.searchsorted(years, years.max()))
+    model = RLSForecaster().fit(ts[:cut], vals[:cut])
+    state = os.path.join(root, 'data', 'processed', f'rls_{zone}.npz')
+    os.makedirs(os.path.dirname(state), exist_ok=True)
+    model.save(state)
+    model = RLSForecaster.load(state)
+    preds = np.array([model.update(t, float(y)) for t, y in zip(ts[cut:], vals[cut:])])
+    ok = np.isfinite(preds)
+    err = vals[cut:][ok] - preds[ok]
+    print(f"{zone} {int(years.max())}: {ok.sum()} hourly updates, MAE={np.mean(np.abs(err)):.2f} RMSE={np.sqrt(np.mean(err**2)):.2f}")
+    print(f"Next hour: {model.predict_next()}")
+    print(f"State: {model.save(state)}")
+
+if __name__ == '__main__':
+    main()
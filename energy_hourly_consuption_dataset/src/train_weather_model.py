@@ -3,29 +3,31 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-from pandas.tseries.holiday import USFederalHolidayCalendar
+try:
+    from src import dataset_cache
+    from src import calendar_features
+except ImportError:
+    import dataset_cache
+    import calendar_features
 
-def load_data(path):
-    df = pd.read_csv(path)
-    df['Datetime'] = pd.to_datetime(df['Datetime'])
-    return df
+def load_data(root):
+    return dataset_cache.load_integrated(root)
 
 def add_features(df, weather=False):
     df = df.copy()
-    df['hora'] = df['Datetime'].dt.hour
-    df['dia_semana'] = df['Datetime'].dt.dayofweek
-    df['mes'] = df['Datetime'].dt.month
-    df['ano'] = df['Datetime'].dt.year
+    cal = calendar_features.calendar_arrays(df['Datetime'])
+    df['hora'] = cal['hour']
+    df['dia_semana'] = cal['dayofweek']
+    df['mes'] = cal['month']
+    df['ano'] = cal['year']
     
     # Lags
     df['lag1'] = df['AEP'].shift(1)
     df['lag24'] = df['AEP'].shift(24)
     
     # Weekend/Holiday
-    df['fim_semana'] = df['dia_semana'].isin([5,6]).astype(int)
-    cal = USFederalHolidayCalendar()
-    hdays = cal.holidays(start=str(df['Datetime'].min().date()), end=str(df['Datetime'].max().date()))
-    df['feriado'] = df['Datetime'].dt.normalize().isin(hdays).astype(int)
+    df['fim_semana'] = cal['weekend'].astype(np.int8)
+    df['feriado'] = cal['holiday'].astype(np.int8)
     
     features = ['hora', 'dia_semana', 'mes', 'lag1', 'lag24', 'fim_semana', 'feriado']
     
@@ -82,12 +84,12 @@ def metrics(y_true, y_pred):
     return mae, rmse
 
 def main():
-    path = os.path.join('data', 'processed', 'pjm_integrated.csv')
-    if not os.path.exists(path):
+    try:
+        df = load_data(os.getcwd())
+    except FileNotFoundError:
         print("Data not found.")
         return
-        
-    df = load_data(path)
+
     print(f"Total rows: {len(df)}")
     print(f"Years: {df['Datetime'].dt.year.unique()}")
     
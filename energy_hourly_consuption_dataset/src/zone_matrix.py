@@ -0,0 +1,229 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import yaml
+try:
+    from src import data_prep
+    from src import dataset_cache
+except ImportError:
+    import data_prep
+    import dataset_cache
+
+# On-disk layout (data/processed/zone_matrix/):
+# - values.f32: float32 memmap, shape (zones, capacity), zone-major (one contiguous
+#   row per zone), NaN where missing; hours past n_hours are preallocated room
+#   for appends
+# - count.u16: uint16 memmap, shape (zones, capacity), raw values averaged into
+#   each hour (so appends keep the count-weighted mean of a full rebuild)
+# - valid.bits: uint8 memmap, shape (zones, ceil(hours/8)), little-endian bit order
+# - meta.json: time axis start (epoch seconds), number of hours, capacity, zones and source key
+
+HOUR = 3600
+CAPACITY_SLACK = 24 * 366  # free hours reserved after the time axis at build / growth
+
+def matrix_dir(root):
+    return os.path.join(dataset_cache.processed_dir(root), 'zone_matrix')
+
+def read_catalog(root):
+    path = os.path.join(root, 'data', 'catalog.yaml')
+    with open(path, 'r', encoding='utf-8') as f:
+        cat = yaml.safe_load(f)
+    return [(it['zone'], os.path.join(root, it['file'])) for it in cat.get('files', [])]
+
+def read_period(root):
+    path = os.path.join(root, 'configs', 'params.yaml')
+    start, end = '1998-01-01', '2018-12-31'
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            period = (yaml.safe_load(f) or {}).get('period', {})
+        start = str(period.get('start', start))
+        end = str(period.get('end', end))
+    t0 = int(pd.Timestamp(start).value // 10**9)
+    t1 = int((pd.Timestamp(end) + pd.Timedelta(hours=23)).value // 10**9)
+    return t0, (t1 - t0) // HOUR + 1
+
+def _paths(root):
+    d = matrix_dir(root)
+    return os.path.join(d, 'values.f32'), os.path.join(d, 'valid.bits'), os.path.join(d, 'meta.json')
+
+def _count_path(root):
+    return os.path.join(matrix_dir(root), 'count.u16')
+
+def _alloc(p_val, p_cnt, n_zones, capacity):
+    values = np.memmap(p_val, dtype=np.float32, mode='w+', shape=(n_zones, capacity))
+    values[:] = np.nan
+    values.flush()
+    counts = np.memmap(p_cnt, dtype=np.uint16, mode='w+', shape=(n_zones, capacity))
+    counts.flush()
+    del values, counts
+
+def _grow(p_val, p_cnt, n_zones, capacity, need):
+    # Rows are zone-major, so a longer time axis means new files: copied one zone
+    # at a time, with CAPACITY_SLACK spare hours so growth stays rare.
+    new_cap = need + CAPACITY_SLACK
+    _alloc(p_val + '.grow', p_cnt + '.grow', n_zones, new_cap)
+    for src, dst, dtype in [(p_val, p_val + '.grow', np.float32), (p_cnt, p_cnt + '.grow', np.uint16)]:
+        old = np.memmap(src, dtype=dtype, mode='r', shape=(n_zones, capacity))
+        new = np.memmap(dst, dtype=dtype, mode='r+', shape=(n_zones, new_cap))
+        for j in range(n_zones):
+            new[j, :capacity] = old[j]
+        new.flush()
+        del old, new
+        os.replace(dst, src)
+    return new_cap
+
+def _write_bits(path, packed, n_hours):
+    n_bytes = max((n_hours + 7) // 8, 1)
+    bits = np.zeros((len(packed), n_bytes), dtype=np.uint8)
+    for j, row in enumerate(packed):
+        bits[j, :len(row)] = row
+    bits.tofile(path)
+
+def _read_bits(path, n_zones, n_hours):
+    return list(np.fromfile(path, dtype=np.uint8).reshape(n_zones, max((n_hours + 7) // 8, 1)))
+
+def current_key(root):
+    catalog = [p for _, p in read_catalog(root) if os.path.exists(p)]
+    return dataset_cache.signature_key(dataset_cache.source_signature(root, catalog))
+
+def build_zone_matrix(root, key=None):
+    catalog = [(z, p) for z, p in read_catalog(root) if os.path.exists(p)]
+    if key is None:
+        key = current_key(root)
+    start, n_hours = read_period(root)
+    zones = [z for z, _ in catalog]
+    os.makedirs(matrix_dir(root), exist_ok=True)
+    p_val, p_bits, p_meta = _paths(root)
+    p_cnt = _count_path(root)
+    tmp, tmp_cnt = p_val + '.tmp', p_cnt + '.tmp'
+    capacity = n_hours + CAPACITY_SLACK
+    _alloc(tmp, tmp_cnt, len(zones), capacity)
+    packed = []
+    dropped = {}
+    # One zone at a time: only a single zone's rows are ever held in memory.
+    for j, (zone, path) in enumerate(catalog):
+        _, ts, vals, _ = data_prep.parse_zone_file(path)
+        pos = (ts - start) // HOUR
+        inside = pos >= 0
+        if not inside.all():
+            dropped[zone] = int((~inside).sum())
+        pos, vals = pos[inside], vals[inside]
+        if len(pos) and pos[-1] >= n_hours:
+            n_hours = int(pos[-1]) + 1
+            if n_hours > capacity:
+                capacity = _grow(tmp, tmp_cnt, len(zones), capacity, n_hours)
+        dense, count = data_prep.scatter_mean(pos, vals, n_hours)
+        values = np.memmap(tmp, dtype=np.float32, mode='r+', shape=(len(zones), capacity))
+        values[j, :n_hours] = dense
+        values.flush()
+        counts = np.memmap(tmp_cnt, dtype=np.uint16, mode='r+', shape=(len(zones), capacity))
+        counts[j, :n_hours] = np.minimum(count, np.iinfo(np.uint16).max)
+        counts.flush()
+        del values, counts
+        packed.append(np.packbits(count > 0, bitorder='little'))
+        del ts, vals, dense, count
+    _write_bits(p_bits + '.tmp', packed, n_hours)
+    os.replace(tmp, p_val)
+    os.replace(tmp_cnt, p_cnt)
+    os.replace(p_bits + '.tmp', p_bits)
+    meta = {'start': start, 'n_hours': n_hours, 'capacity': capacity, 'zones': zones, 'key': key,
+            'dropped_before_start': dropped}
+    with open(p_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def append_rows(root, arrays):
+    # Writes new (ts, values) per zone into the existing matrix, growing the time
+    # axis when needed. Cost is proportional to the new rows; an hour that is
+    # already filled gets the count-weighted mean of old and new values, the same
+    # rule scatter_mean applies in a full build.
+    p_val, p_bits, p_meta = _paths(root)
+    p_cnt = _count_path(root)
+    if not os.path.exists(p_meta):
+        return None
+    with open(p_meta, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    zones = meta['zones']
+    if any(z not in zones for z in arrays) or 'capacity' not in meta or not os.path.exists(p_cnt):
+        return build_zone_matrix(root)
+    start, n_hours, capacity = meta['start'], meta['n_hours'], meta['capacity']
+    packed = _read_bits(p_bits, len(zones), n_hours)
+    last = max((int(ts[-1]) for ts, _ in arrays.values() if len(ts)), default=start)
+    need = (last - start) // HOUR + 1
+    if need > capacity:
+        capacity = _grow(p_val, p_cnt, len(zones), capacity, need)
+    n_hours = max(n_hours, need)
+    values = np.memmap(p_val, dtype=np.float32, mode='r+', shape=(len(zones), capacity))
+    counts = np.memmap(p_cnt, dtype=np.uint16, mode='r+', shape=(len(zones), capacity))
+    for zone, (ts, vals) in arrays.items():
+        j = zones.index(zone)
+        pos = (ts - start) // HOUR
+        keep = pos >= 0
+        u, inv = np.unique(pos[keep], return_inverse=True)
+        mean, count = data_prep.scatter_mean(inv, vals[keep], len(u))
+        u, mean, count = u[count > 0], mean[count > 0], count[count > 0]
+        row = packed[j]
+        if len(row) * 8 < n_hours:
+            row = np.concatenate([row, np.zeros((n_hours + 7) // 8 - len(row), dtype=np.uint8)])
+        c_old = counts[j, u].astype(np.float64)
+        old = np.where(c_old > 0, values[j, u].astype(np.float64), 0.0)
+        total = c_old + count
+        values[j, u] = (old * c_old + mean * count) / total
+        counts[j, u] = np.minimum(total, np.iinfo(np.uint16).max)
+        np.bitwise_or.at(row, u >> 3, (1 << (u & 7)).astype(np.uint8))
+        packed[j] = row
+    values.flush()
+    counts.flush()
+    del values, counts
+    _write_bits(p_bits, packed, n_hours)
+    meta.update({'n_hours': n_hours, 'capacity': capacity, 'key': current_key(root)})
+    with open(p_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def open_zone_matrix(root, rebuild=False):
+    p_val, p_bits, p_meta = _paths(root)
+    key = current_key(root)
+    meta = None
+    if not rebuild and all(os.path.exists(p) for p in [p_meta, p_val, p_bits, _count_path(root)]):
+        with open(p_meta, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('key') != key or 'capacity' not in meta:
+            meta = None
+    if meta is None:
+        meta = build_zone_matrix(root, key=key)
+    n_zones = len(meta['zones'])
+    return {
+        'start': meta['start'],
+        'n_hours': meta['n_hours'],
+        'zones': meta['zones'],
+        'values': np.memmap(p_val, dtype=np.float32, mode='r', shape=(n_zones, meta['capacity']))[:, :meta['n_hours']],
+        'valid': np.memmap(p_bits, dtype=np.uint8, mode='r', shape=(n_zones, max((meta['n_hours'] + 7) // 8, 1))),
+    }
+
+def hourly_index(m):
+    t = m['start'] + np.arange(m['n_hours'], dtype=np.int64) * HOUR
+    return pd.DatetimeIndex(t.astype('datetime64[s]').astype('datetime64[ns]'))
+
+def zone_view(m, zone):
+    # Contiguous row of the memmap: only this zone's pages are read when touched.
+    return m['values'][m['zones'].index(zone)]
+
+def zone_valid(m, zone):
+    row = m['valid'][m['zones'].index(zone)]
+    return np.unpackbits(row, count=m['n_hours'], bitorder='little').view(bool)
+
+def zone_frame(m, zone, value_col=None):
+    # Datetime + zone column on the full contiguous axis; missing hours are NaN.
+    col = value_col or zone
+    return pd.DataFrame({'Datetime': hourly_index(m), col: zone_view(m, zone)}, copy=False)
+
+def main():
+    meta = build_zone_matrix(os.getcwd())
+    if meta['dropped_before_start']:
+        print(f"Rows before the configured start were dropped: {meta['dropped_before_start']}")
+    print(f"Zone matrix: {meta['n_hours']} hours x {len(meta['zones'])} zones -> {matrix_dir(os.getcwd())}")
+
+if __name__ == '__main__':
+    main()
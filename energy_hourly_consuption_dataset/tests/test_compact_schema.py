@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+import mvp_energy
+
+@pytest.fixture
+def series(tmp_path):
+    dt = pd.date_range('2016-12-01', periods=24 * 60, freq='h')
+    load = 15000 + 2000 * np.sin(2 * np.pi * dt.hour / 24)
+    raw = pd.DataFrame({'Datetime': dt.strftime('%Y-%m-%d %H:%M:%S'), 'AEP_MW': load})
+    raw = pd.concat([raw, raw.iloc[[100]]])  # duplicated hour goes through the aggregation
+    path = tmp_path / 'AEP_hourly.csv'
+    raw.to_csv(path, index=False)
+    return mvp_energy.add_time_features(mvp_energy.load_series(str(path), 'AEP_MW'))
+
+def test_hot_path_has_no_object_or_int64_columns(series):
+    dtypes = series.dtypes
+    assert not (dtypes == object).any(), dtypes[dtypes == object]
+    assert not (dtypes == np.int64).any(), dtypes[dtypes == np.int64]
+    assert isinstance(series['estacao'].dtype, pd.CategoricalDtype)
+    assert series['AEP_MW'].dtype == np.float32
+    for col, dtype in mvp_energy.COMPACT_SCHEMA.items():
+        assert str(series[col].dtype) == dtype, col
+    for build in (mvp_energy.build_features, mvp_energy.build_features_weekend):
+        df_time, X, y = build(series, 'AEP_MW')
+        assert len(df_time) == len(X) == len(y) > 0
+        assert X.dtype == np.float64 and np.isfinite(X).all()
+
+def test_schema_guard_rejects_object_columns(series):
+    bad = series.copy()
+    bad['estacao'] = bad['estacao'].astype(str).astype(object)
+    with pytest.raises(TypeError):
+        mvp_energy.check_compact_schema(bad)
+    with pytest.raises(TypeError):
+        mvp_energy.build_features(bad, 'AEP_MW')
+
+def test_schema_guard_rejects_widened_columns(series):
+    wide = series.copy()
+    wide['hora'] = wide['hora'].astype(np.int64)
+    with pytest.raises(TypeError):
+        mvp_energy.check_compact_schema(wide)
+    wide = series.copy()
+    wide['AEP_MW'] = wide['AEP_MW'].astype(np.float64)
+    with pytest.raises(TypeError):
+        mvp_energy.build_features(wide, 'AEP_MW')
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import pandas as pd
+from h2_dispatch import dispatch, dispatch_params, summarize_dispatch
+
+def _frame(days=20, pv=False):
+    dt = pd.date_range('2001-01-01', periods=24 * days, freq='h')
+    hour = dt.hour.values
+    load = 1000.0 + 300.0 * np.sin(2 * np.pi * (hour - 6) / 24)
+    load[24 * 8:24 * 11] = np.nan  # gap inside the series
+    load[24 * 17:] = np.nan  # series ends before the frame does
+    df = pd.DataFrame({'Datetime': dt, 'load_total': load, 'co2e_kg_per_kg': 0.02, 'h2_kg': 0.0, 'h2_co2e_kg': 0.0})
+    if pv:
+        df['kw_available'] = np.where((hour >= 7) & (hour <= 17), 10000.0, 0.0)  # step changes
+    return df
+
+def test_dispatch_respects_ramp_on_every_transition():
+    for pv in (False, True):
+        res = dispatch(_frame(pv=pv), 10, 52)
+        ramp = dispatch_params(None)['ramp_frac_per_h'] * 10000.0
+        h2_kw = res['h2_kw'].values
+        assert np.abs(np.diff(np.concatenate([[0.0], h2_kw]))).max() <= ramp + 1e-9
+        on = h2_kw > 0
+        assert (h2_kw[on] >= dispatch_params(None)['min_load_frac'] * 10000.0 - 1e-9).all()
+
+def test_days_without_load_are_not_dispatched():
+    res = dispatch(_frame(), 10, 52)
+    idle = ~res['dispatch_active'].values
+    assert idle.sum() == 24 * 6
+    assert (res['h2_kw'].values[idle] == 0).all()
+    assert (res['unmet_kg'].values[idle] == 0).all()
+    assert summarize_dispatch(res, 10)['hours_dispatched'] == 24 * 14
+
+def test_dispatch_recomputes_emissions():
+    res = dispatch(_frame(), 10, 52)
+    assert np.allclose(res['h2_co2e_kg'], res['h2_kg'] * 0.02)
+    assert res['h2_co2e_kg'].sum() > 0
+
+def test_missing_pv_limit_runs_at_capacity():
+    # kw_available is NaN outside the meteo window (pv_kw NaN): full capacity, not "no data"
+    df = _frame()
+    n = len(df)
+    df['pv_kw'] = np.where(np.arange(n) < 24 * 4, 8000.0, np.nan)
+    df['kw_available'] = np.minimum(df['pv_kw'], 10000.0)
+    res = dispatch(df, 10, 52)
+    assert summarize_dispatch(res, 10)['hours_dispatched'] == 24 * 14
+    assert res['h2_kw'].values[:24 * 4].max() <= 8000.0
+    assert res['h2_kw'].values[24 * 4:].max() > 8000.0
+    assert res['unmet_kg'].sum() < 1e-9
+
+def test_dispatch_raises_without_overlapping_data():
+    df = _frame()
+    df['pv_kw'] = 1.0
+    df['kw_available'] = np.nan
+    with pytest.raises(ValueError):
+        dispatch(df, 10, 52)
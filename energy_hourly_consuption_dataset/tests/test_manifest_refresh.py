@@ -0,0 +1,48 @@
+import os
+import hashlib
+import quality_checks
+
+def _raw(root, text):
+    d = os.path.join(root, 'data', 'raw')
+    os.makedirs(d, exist_ok=True)
+    p = os.path.join(d, 'X_hourly.csv')
+    with open(p, 'a', encoding='utf-8') as f:
+        f.write(text)
+    return p
+
+def _entry(root):
+    items, _ = quality_checks.read_manifest_entries(str(root))
+    return items['data/raw/X_hourly.csv']
+
+def test_append_defers_whole_file_md5(tmp_path):
+    root = str(tmp_path)
+    p = _raw(root, 'Datetime,X_MW\n2018-01-01 01:00:00,1.0\n')
+    quality_checks.refresh_manifest(root, [p])
+    first = _entry(root)
+    _raw(root, '2018-01-01 02:00:00,2.0\n')
+    _, changes = quality_checks.refresh_manifest(root, [p])
+    e = _entry(root)
+    assert changes['data/raw/X_hourly.csv']['status'] == 'appended'
+    assert e['md5'] is None
+    assert e['chain_md5'] != first['chain_md5'] and len(e['segments']) == 2
+    # touched but not changed: re-read in full, so md5 gets filled in
+    os.utime(p, None)
+    st = os.stat(p)
+    os.utime(os.path.join(root, 'data', 'manifest.json'), (st.st_atime - 10, st.st_mtime - 10))
+    _, changes = quality_checks.refresh_manifest(root, [p])
+    assert changes['data/raw/X_hourly.csv']['status'] == 'unchanged'
+    with open(p, 'rb') as f:
+        real = hashlib.md5(f.read()).hexdigest()
+    assert _entry(root)['md5'] == real
+    assert len(_entry(root)['segments']) == 2
+
+def test_full_read_supplies_deferred_md5(tmp_path):
+    root = str(tmp_path)
+    p = _raw(root, 'Datetime,X_MW\n2018-01-01 01:00:00,1.0\n')
+    quality_checks.refresh_manifest(root, [p])
+    _raw(root, '2018-01-01 02:00:00,2.0\n')
+    quality_checks.refresh_manifest(root, [p])
+    full = quality_checks.basic_checks(p)['md5']
+    quality_checks.refresh_manifest(root, [p], md5s={p: full})
+    with open(p, 'rb') as f:
+        assert _entry(root)['md5'] == full == hashlib.md5(f.read()).hexdigest()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import calendar_features
+from residual_analytics import error_breakdown
+
+def _model(start, days, seed):
+    dt = pd.date_range(start, periods=24 * days, freq='h')
+    res = np.random.default_rng(seed).normal(50.0, 200.0, len(dt))
+    res[::37] = np.nan
+    return dt, res
+
+def _groupby(dt, res):
+    # Reference: plain DataFrame + groupby per key
+    d = pd.DataFrame({'res': res}).dropna()
+    t = pd.Series(dt)[d.index]
+    d['hora'], d['dia_semana'], d['mes'] = t.dt.hour.values, t.dt.dayofweek.values, t.dt.month.values
+    hol = pd.to_datetime(calendar_features.holiday_days(), unit='D')
+    d['feriado'] = t.dt.normalize().isin(hol).astype(int).values
+    d['abs'], d['sq'] = d['res'].abs(), d['res'] ** 2
+    out = {}
+    for keys in [['hora'], ['dia_semana'], ['mes'], ['feriado'], ['feriado', 'hora']]:
+        g = d.groupby(keys)
+        out['_'.join(keys)] = pd.DataFrame({'mae': g['abs'].mean(), 'rmse': np.sqrt(g['sq'].mean()), 'n': g.size()})
+    return out
+
+def _check(got, ref, name):
+    for key, exp in ref.items():
+        frame = got[key]
+        frame = frame[frame[f'n_{name}'] > 0]
+        assert list(frame.index) == list(exp.index), key
+        assert np.allclose(frame[f'mae_{name}'].values, exp['mae'].values), key
+        assert np.allclose(frame[f'rmse_{name}'].values, exp['rmse'].values), key
+        assert (frame[f'n_{name}'].values == exp['n'].values).all(), key
+
+def test_breakdown_matches_groupby_without_holidays():
+    dt, res = _model('2016-03-01', 30, 0)
+    ref = _groupby(dt, res)
+    assert list(ref['feriado'].index) == [0]  # empty holiday group
+    got = error_breakdown({'v1': (dt, res)})
+    _check(got, ref, 'v1')
+    assert list(got['feriado'].index) == [0]
+
+def test_breakdown_matches_groupby_per_model():
+    # v1 has no holidays, v2 covers July 4th: the shared frame keeps the
+    # holiday rows with n_v1 == 0
+    a, b = _model('2016-03-01', 30, 1), _model('2016-06-25', 20, 2)
+    got = error_breakdown({'v1': a, 'v2': b})
+    _check(got, _groupby(*a), 'v1')
+    _check(got, _groupby(*b), 'v2')
+    hol = got['feriado'].loc[1]
+    assert hol['n_v1'] == 0 and np.isnan(hol['mae_v1']) and hol['n_v2'] > 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from rls_forecaster import RLSForecaster, HOUR
+
+def _series(days=60, gaps=((300, 305), (1300, 1340))):
+    dt = pd.date_range('2016-01-04', periods=24 * days, freq='h')
+    h = np.arange(len(dt))
+    y = 1000.0 + 200.0 * np.sin(2 * np.pi * h / 24) + 50.0 * np.sin(2 * np.pi * h / 168)
+    y += np.random.default_rng(0).normal(0.0, 20.0, len(dt))
+    keep = np.ones(len(dt), dtype=bool)
+    for a, b in gaps:
+        keep[a:b] = False  # missing hours inside the index
+    ts = dt.values[keep].astype('datetime64[s]').astype(np.int64)
+    return ts, y[keep]
+
+def _same(a, b):
+    ca, cb = a.coefficients(), b.coefficients()
+    assert np.allclose([ca[k] for k in ca], [cb[k] for k in ca], rtol=1e-6, atol=1e-8)
+    assert a.predict_next()[0] == b.predict_next()[0]
+    assert np.isclose(a.predict_next()[1], b.predict_next()[1], rtol=1e-8)
+
+def test_update_after_fit_matches_refit():
+    ts, y = _series()
+    cut = 1200  # the 40-hour gap falls in the streamed part
+    for lam in (1.0, 0.995):
+        model = RLSForecaster(forgetting=lam).fit(ts[:cut], y[:cut])
+        for t, v in zip(ts[cut:], y[cut:]):
+            model.update(t, v)
+        _same(model, RLSForecaster(forgetting=lam).fit(ts, y))
+
+def test_save_load_round_trip(tmp_path):
+    ts, y = _series()
+    model = RLSForecaster(forgetting=0.995).fit(ts[:1000], y[:1000])
+    path = model.save(str(tmp_path / 'rls.npz'))
+    loaded = RLSForecaster.load(path)
+    _same(model, loaded)
+    assert loaded.fit_hour == model.fit_hour and loaded.n_updates == model.n_updates
+    for t, v in zip(ts[1000:1100], y[1000:1100]):
+        assert np.allclose(model.update(t, v), loaded.update(t, v), equal_nan=True)
+    _same(model, loaded)
+
+def test_hour_features_outside_holiday_table():
+    ts, y = _series()
+    model = RLSForecaster().fit(ts, y)
+    t = pd.Timestamp('2031-01-01 00:00').value // 10**9
+    with pytest.raises(ValueError):
+        model.update(t, 1000.0)
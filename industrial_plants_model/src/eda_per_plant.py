@@ -1,29 +1,17 @@
 import os
 import pandas as pd
 import numpy as np
+try:
+    from src import load_profiles
+except ImportError:
+    import load_profiles
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPORTS_DIR = os.path.join(BASE_DIR, "reports")
 DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), "Load profile data of 50 industrial plants")
 
 def load_data():
-    df_2016 = pd.read_csv(
-        os.path.join(DATA_DIR, "LoadProfile_20IPs_2016.csv"),
-        sep=";", header=1, low_memory=False
-    ).rename(columns={"Time stamp": "timestamp"})
-    df_2017 = pd.read_csv(
-        os.path.join(DATA_DIR, "LoadProfile_30IPs_2017.csv"),
-        sep=";", header=1, low_memory=False
-    ).rename(columns={"Time stamp": "timestamp"})
-    df_long_16 = df_2016.melt(id_vars="timestamp", var_name="plant_id", value_name="load_kW")
-    df_long_16["plant_id"] = "2016_" + df_long_16["plant_id"].str.replace("LG ", "")
-    df_long_17 = df_2017.melt(id_vars="timestamp", var_name="plant_id", value_name="load_kW")
-    df_long_17["plant_id"] = "2017_" + df_long_17["plant_id"].str.replace("LG ", "")
-    df = pd.concat([df_long_16, df_long_17], ignore_index=True)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%d.%m.%Y %H:%M:%S", errors="coerce")
-    df = df.dropna(subset=["timestamp"])
-    df["load_kW"] = df["load_kW"].astype(str).str.replace(",", ".").replace("", "0").astype(float)
-    return df
+    return load_profiles.load_long(DATA_DIR)
 
 def summarize(df):
     df["hour"] = df["timestamp"].dt.hour
@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+# --- Feature engine ---
+# The long frame (one row per plant and timestamp) is reshaped into a dense
+# (plants x steps) float64 array, left-aligned per plant and NaN-padded, so that
+# position i of a plant row is its i-th record. Lags are shifted slices and
+# rolling stats come from cumulative sums / strided window views over the whole
+# array at once; results are gathered back to the original row order.
+# Semantics match groupby("plant_id").shift(k) and x.shift(1).rolling(w) with
+# the default min_periods=w (any NaN in the window gives NaN).
+# Everything stays float64, the dtype the shipped model was trained on: float32
+# lags move values by up to ~5e-5 kW, enough to cross a histogram-GBM bin edge.
+
+LAGS = [1, 2, 3, 4, 8, 95, 96, 97, 672]
+HORIZON = 4
+ROLL_LONG = 96
+ROLL_SHORT = 4
+
+def dense_layout(plant_ids):
+    """Row order, plant code and position within the plant for every row."""
+    codes, plants = pd.factorize(plant_ids, sort=True)
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(plants))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    pos = np.arange(len(order)) - np.repeat(starts, counts)
+    steps = int(counts.max()) if len(counts) else 0
+    code = codes[order]
+    return {"order": order, "code": code, "pos": pos, "plants": plants, "steps": steps,
+            "flat": code * steps + pos, "in_order": bool(np.all(order[1:] > order[:-1]))}
+
+def to_dense(layout, values):
+    dense = np.full((len(layout["plants"]), layout["steps"]), np.nan, dtype=np.float64)
+    dense[layout["code"], layout["pos"]] = np.asarray(values, dtype=np.float64)[layout["order"]]
+    return dense
+
+def to_long(layout, dense):
+    vals = dense.ravel()[layout["flat"]]
+    if layout["in_order"]:
+        return vals
+    out = np.empty(len(vals), dtype=dense.dtype)
+    out[layout["order"]] = vals
+    return out
+
+def shifted(dense, k):
+    """Dense equivalent of groupby().shift(k); negative k looks ahead."""
+    out = np.full_like(dense, np.nan)
+    if k > 0:
+        out[:, k:] = dense[:, :-k]
+    elif k < 0:
+        out[:, :k] = dense[:, -k:]
+    else:
+        out[:] = dense
+    return out
+
+def _window_sums(dense, w):
+    # Sums over the w values before each step (x.shift(1).rolling(w)), centered
+    # per plant for a stable variance.
+    x = np.asarray(dense, dtype=np.float64)
+    ok = np.isfinite(x)
+    cnt = ok.sum(axis=1, keepdims=True)
+    center = np.where(ok, x, 0.0).sum(axis=1, keepdims=True) / np.maximum(cnt, 1)
+    xc = np.where(ok, x - center, 0.0)
+    pad = np.zeros((len(x), 1))
+    c1 = np.concatenate([pad, np.cumsum(xc, axis=1)], axis=1)
+    c2 = np.concatenate([pad, np.cumsum(xc * xc, axis=1)], axis=1)
+    cn = np.concatenate([pad, np.cumsum(ok, axis=1, dtype=np.float64)], axis=1)
+    steps = x.shape[1]
+    s1 = np.full(x.shape, np.nan)
+    s2 = np.full(x.shape, np.nan)
+    n = np.zeros(x.shape)
+    if steps > w:
+        s1[:, w:] = c1[:, w:steps] - c1[:, :steps - w]
+        s2[:, w:] = c2[:, w:steps] - c2[:, :steps - w]
+        n[:, w:] = cn[:, w:steps] - cn[:, :steps - w]
+    full = n == w
+    return np.where(full, s1, np.nan), np.where(full, s2, np.nan), center
+
+def rolling_mean_std(dense, w):
+    s1, s2, center = _window_sums(dense, w)
+    mean = s1 / w + center
+    var = np.maximum((s2 - s1 * s1 / w) / (w - 1), 0.0)
+    return mean, np.sqrt(var)
+
+def rolling_min_max(dense, w):
+    # Strided windows over the previous w steps; NaN propagates like min_periods=w.
+    prev = shifted(dense, 1)
+    lo = np.full_like(dense, np.nan)
+    hi = np.full_like(dense, np.nan)
+    if dense.shape[1] >= w:
+        win = np.lib.stride_tricks.sliding_window_view(prev, w, axis=1)
+        lo[:, w - 1:] = win.min(axis=2)
+        hi[:, w - 1:] = win.max(axis=2)
+    return lo, hi
+
+def lag_rolling_features(dense, lags=LAGS, horizon=None):
+    """Every lag / rolling column as dense arrays, in the model's column order."""
+    feats = {}
+    if horizon is not None:
+        feats["target"] = shifted(dense, -horizon)
+    for lag in lags:
+        feats[f"lag_{lag}"] = shifted(dense, lag)
+    feats["roll_mean_24h"], feats["roll_std_24h"] = rolling_mean_std(dense, ROLL_LONG)
+    feats["roll_mean_1h"], _ = rolling_mean_std(dense, ROLL_SHORT)
+    feats["roll_min_1h"], feats["roll_max_1h"] = rolling_min_max(dense, ROLL_SHORT)
+    order = (["target"] if horizon is not None else []) + [f"lag_{lag}" for lag in lags] + \
+        ["roll_mean_24h", "roll_std_24h", "roll_mean_1h", "roll_max_1h", "roll_min_1h"]
+    return {k: feats[k] for k in order}
+
+def history_size(lags=LAGS):
+    """Records needed to build the features of the newest one."""
+    return max(max(lags), ROLL_LONG) + 1
+
+def latest_features(history, lags=LAGS):
+    """Lag / rolling features of the last record of one plant (oldest first, NaN allowed)."""
+    h = np.asarray(history, dtype=np.float64)
+    if len(h) < history_size(lags):
+        return None
+    feats = {f"lag_{lag}": h[-1 - lag] for lag in lags}
+    day, hour = h[-1 - ROLL_LONG:-1], h[-1 - ROLL_SHORT:-1]
+    feats["roll_mean_24h"] = day.mean()
+    feats["roll_std_24h"] = day.std(ddof=1)
+    feats["roll_mean_1h"] = hour.mean()
+    feats["roll_max_1h"] = hour.max()
+    feats["roll_min_1h"] = hour.min()
+    return feats
+
+class PlantHistory:
+    """Bounded per-plant history for streaming: the last history_size() loads and the last timestamp."""
+
+    def __init__(self, size=None):
+        self.size = size or history_size()
+        self.loads = {}
+        self.last_ts = {}
+
+    def lag_features(self, df):
+        # df: rows of one chunk (plant_id, timestamp, load_kW) in time order per plant.
+        # Returns the rows that are newer than the stored history with lag / rolling
+        # columns filled from history + chunk, then keeps only the newest records.
+        df = df.sort_values(["plant_id", "timestamp"], kind="stable")
+        last = pd.to_datetime(df["plant_id"].map(self.last_ts))
+        df = df[last.isna() | (df["timestamp"] > last)]
+        if df.empty:
+            return df.copy()
+        groups = list(df.groupby("plant_id", sort=False).indices.items())
+        series = []
+        for plant, rows in groups:
+            hist = self.loads.get(plant, np.empty(0, dtype=np.float64))
+            series.append((hist, df["load_kW"].to_numpy(dtype=np.float64)[rows]))
+        steps = max(len(h) + len(v) for h, v in series)
+        dense = np.full((len(series), steps), np.nan, dtype=np.float64)
+        for i, (h, v) in enumerate(series):
+            dense[i, :len(h)] = h
+            dense[i, len(h):len(h) + len(v)] = v
+        feats = lag_rolling_features(dense)
+        out = df.copy()
+        cols = {k: np.empty(len(df), dtype=np.float64) for k in feats}
+        for i, ((plant, rows), (h, v)) in enumerate(zip(groups, series)):
+            for k, f in feats.items():
+                cols[k][rows] = f[i, len(h):len(h) + len(v)]
+            self.loads[plant] = np.concatenate([h, v])[-self.size:]
+            self.last_ts[plant] = df["timestamp"].iloc[rows[-1]]
+        for k, v in cols.items():
+            out[k] = v
+        return out
+
+    def save(self, path):
+        plants = sorted(self.loads)
+        buf = np.full((len(plants), self.size), np.nan, dtype=np.float64)
+        n = np.zeros(len(plants), dtype=np.int64)
+        for i, p in enumerate(plants):
+            n[i] = len(self.loads[p])
+            buf[i, :n[i]] = self.loads[p]
+        ts = np.array([pd.Timestamp(self.last_ts[p]).value for p in plants], dtype=np.int64)
+        np.savez(path, plants=np.array(plants, dtype=str), loads=buf, n=n, last_ts=ts, size=self.size)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            h = cls(int(z["size"]))
+            for p, row, n, t in zip(z["plants"], z["loads"], z["n"], z["last_ts"]):
+                h.loads[str(p)] = row[:n].astype(np.float64)
+                h.last_ts[str(p)] = pd.Timestamp(int(t))
+        return h
+
+def calendar_columns(timestamps):
+    """Calendar features computed once per distinct timestamp and gathered to rows."""
+    codes, uniq = pd.factorize(pd.Series(timestamps))
+    uniq = pd.DatetimeIndex(uniq)
+    hour = uniq.hour.values
+    dow = uniq.dayofweek.values
+    cols = {
+        "hour": hour,
+        "dayofweek": dow,
+        "month": uniq.month.values,
+        "is_weekend": (dow >= 5).astype(int),
+        "hour_sin": np.sin(2 * np.pi * hour / 24),
+        "hour_cos": np.cos(2 * np.pi * hour / 24),
+        "dow_sin": np.sin(2 * np.pi * dow / 7),
+        "dow_cos": np.cos(2 * np.pi * dow / 7),
+    }
+    return {k: v[codes] for k, v in cols.items()}
+
+def build_features(df, horizon=None):
+    """Calendar, lag and rolling features for a long frame; rows are kept in their order."""
+    df = df.copy()
+    for k, v in calendar_columns(df["timestamp"]).items():
+        df[k] = v
+    layout = dense_layout(df["plant_id"].values)
+    dense = to_dense(layout, df["load_kW"].values)
+    for k, v in lag_rolling_features(dense, horizon=horizon).items():
+        df[k] = to_long(layout, v)
+    return df.dropna()
@@ -0,0 +1,109 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# --- Load profiles ---
+# Shared loader for the wide LoadProfile_*IPs_*.csv files (semicolon separated,
+# decimal comma, one "LG n" column per plant). Values are parsed as floats by
+# read_csv while the frame is still wide, timestamps are parsed once per row,
+# and only the numeric arrays are melted into the long (timestamp, plant_id,
+# load_kW) frame. Missing cells stay NaN. The long frame is cached as a columnar
+# file (parquet, or npz when no parquet engine is installed) under data/processed,
+# keyed on the size and mtime of the source CSVs.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), "Load profile data of 50 industrial plants")
+CACHE_DIR = os.path.join(BASE_DIR, "data", "processed")
+CACHE_NAME = "load_profiles.cache"
+SOURCES = [("2016", "LoadProfile_20IPs_2016.csv"), ("2017", "LoadProfile_30IPs_2017.csv")]
+TIMESTAMP_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+def to_float(values):
+    """Decimal-comma strings (or numbers) to float; NaN stays NaN."""
+    s = pd.Series(values)
+    if s.dtype != object:
+        return s.astype(float)
+    return pd.to_numeric(s.str.replace(",", ".", regex=False))
+
+def read_wide(path):
+    # Numeric wide frame: "timestamp" plus one float column per plant
+    df = pd.read_csv(path, sep=";", header=1, decimal=",", low_memory=False)
+    df = df.rename(columns={"Time stamp": "timestamp"})
+    for c in df.columns:
+        if c != "timestamp" and df[c].dtype == object:
+            df[c] = to_float(df[c]).values
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+    return df.dropna(subset=["timestamp"]).reset_index(drop=True)
+
+def melt_wide(wide, prefix):
+    # Same row order as wide.melt(id_vars="timestamp"): plant by plant, then time
+    cols = [c for c in wide.columns if c != "timestamp"]
+    n = len(wide)
+    return pd.DataFrame({
+        "timestamp": np.tile(wide["timestamp"].values, len(cols)),
+        "plant_id": np.repeat([f"{prefix}_" + str(c).replace("LG ", "") for c in cols], n),
+        "load_kW": wide[cols].to_numpy(dtype=np.float64).T.ravel(),
+    })
+
+def build_long(data_dir=DATA_DIR):
+    parts = [melt_wide(read_wide(os.path.join(data_dir, name)), prefix) for prefix, name in SOURCES]
+    return pd.concat(parts, ignore_index=True)
+
+def source_signature(data_dir=DATA_DIR):
+    sig = {}
+    for _, name in SOURCES:
+        st = os.stat(os.path.join(data_dir, name))
+        sig[name] = [st.st_size, st.st_mtime_ns]
+    return hashlib.md5(json.dumps(sorted(sig.items())).encode("utf-8")).hexdigest()
+
+def _meta_path(cache_dir):
+    return os.path.join(cache_dir, CACHE_NAME + ".json")
+
+def write_cache(df, key, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    tab = pd.DataFrame({
+        "timestamp": df["timestamp"].values.astype("datetime64[s]").astype(np.int64),
+        "plant_id": df["plant_id"].astype(str).values,
+        "load_kW": df["load_kW"].values,
+    })
+    try:
+        path = os.path.join(cache_dir, CACHE_NAME + ".parquet")
+        tab.to_parquet(path, index=False)
+        fmt = "parquet"
+    except ImportError:
+        path = os.path.join(cache_dir, CACHE_NAME + ".npz")
+        np.savez(path, timestamp=tab["timestamp"].values, plant_id=tab["plant_id"].values.astype(str),
+                 load_kW=tab["load_kW"].values)
+        fmt = "npz"
+    with open(_meta_path(cache_dir), "w", encoding="utf-8") as f:
+        json.dump({"key": key, "format": fmt, "file": os.path.basename(path), "rows": int(len(tab))}, f, indent=2)
+
+def read_cache(key, cache_dir=CACHE_DIR):
+    p = _meta_path(cache_dir)
+    if not os.path.exists(p):
+        return None
+    with open(p, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    path = os.path.join(cache_dir, meta["file"])
+    if meta.get("key") != key or not os.path.exists(path):
+        return None
+    if meta["format"] == "parquet":
+        df = pd.read_parquet(path)
+    else:
+        with np.load(path) as z:
+            df = pd.DataFrame({c: z[c] for c in ["timestamp", "plant_id", "load_kW"]})
+        df["plant_id"] = df["plant_id"].astype(object)
+    df["timestamp"] = pd.to_datetime(df["timestamp"].values, unit="s")
+    return df
+
+def load_long(data_dir=DATA_DIR, cache_dir=CACHE_DIR, rebuild=False):
+    """Long frame (timestamp, plant_id, load_kW) of both years, from the cache when the CSVs are unchanged."""
+    key = source_signature(data_dir)
+    df = None if rebuild else read_cache(key, cache_dir)
+    if df is None:
+        print("Parsing load profiles...")
+        df = build_long(data_dir)
+        write_cache(df, key, cache_dir)
+    return df
@@ -0,0 +1,84 @@
+import json
+import time
+import argparse
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+
+# Local load generator for serve.py: seeds every plant with enough synthetic
+# history, then fires /predict calls from concurrent clients (one step ahead per
+# call and plant) and reports throughput, latency and the server's batch sizes.
+
+def post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as r:
+        return json.loads(r.read())
+
+def get(url):
+    with urllib.request.urlopen(url) as r:
+        return json.loads(r.read())
+
+def synthetic_load(step, plant):
+    return float(500 + 100 * np.sin(2 * np.pi * step / 96) + 20 * np.sin(plant + step / 672))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the industrial prediction server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8100")
+    parser.add_argument("--plants", nargs="*", default=None, help="Plant ids (default: 2016_1 ... 2016_20)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--history", type=int, default=673)
+    parser.add_argument("--start", default="2016-01-01 00:00:00")
+    args = parser.parse_args()
+    plants = args.plants or [f"2016_{i}" for i in range(1, 21)]
+    t0 = pd.Timestamp(args.start)
+    step = pd.Timedelta(minutes=15)
+
+    print(f"Seeding {len(plants)} plants with {args.history} records...")
+    for j, p in enumerate(plants):
+        post(args.url + "/observe", [{"plant_id": p, "timestamp": str(t0 + i * step), "load_kW": synthetic_load(i, j)}
+                                     for i in range(args.history)])
+
+    # Each plant advances by one step per call; a per-plant lock keeps its timestamps ordered.
+    next_step = {p: args.history for p in plants}
+    locks = {p: threading.Lock() for p in plants}
+    latencies = []
+    errors = [0]
+    counter = iter(range(args.requests))
+    guard = threading.Lock()
+
+    def client():
+        while True:
+            with guard:
+                k = next(counter, None)
+            if k is None:
+                return
+            j = k % len(plants)
+            p = plants[j]
+            with locks[p]:
+                i = next_step[p]
+                next_step[p] += 1
+                t = time.perf_counter()
+                res = post(args.url + "/predict", {"plant_id": p, "timestamp": str(t0 + i * step), "load_kW": synthetic_load(i, j)})
+                dt = time.perf_counter() - t
+            with guard:
+                latencies.append(dt)
+                errors[0] += "error" in res
+
+    print(f"Sending {args.requests} /predict requests with {args.concurrency} clients...")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1000.0
+    print(f"Throughput: {len(lat) / elapsed:.0f} req/s over {elapsed:.2f} s ({errors[0]} errors)")
+    print(f"Client latency ms: p50={np.percentile(lat, 50):.2f} p95={np.percentile(lat, 95):.2f} p99={np.percentile(lat, 99):.2f}")
+    m = get(args.url + "/metrics")
+    print(f"Server: {m['batches']} batches, mean batch {m['mean_batch']:.1f} rows, latency ms {m['latency_ms']}")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,14 @@ import numpy as np
 import joblib
 import json
 import warnings
+try:
+    from src import feature_engine
+    from src import load_profiles
+    from src import weather_proxy
+except ImportError:
+    import feature_engine
+    import load_profiles
+    import weather_proxy
 
 warnings.filterwarnings('ignore')
 
@@ -16,26 +24,11 @@ MODELS_DIR = os.path.join(BASE_DIR, "models")
 WEATHER_DATA_PATH = os.path.join(os.path.dirname(BASE_DIR), "Hourly Power Load and Climate Data", "PowerLoad_Dataset.csv")
 
 def load_weather_proxy():
-    """Loads and creates the weather proxy from historical data."""
-    if not os.path.exists(WEATHER_DATA_PATH):
-        raise FileNotFoundError(f"Weather data not found at {WEATHER_DATA_PATH}")
-    
+    """Loads the precomputed weather proxy table (built from historical data if missing)."""
     print("Loading Weather Data Proxy...")
-    weather_df = pd.read_csv(WEATHER_DATA_PATH)
-    weather_df["Timestamp"] = pd.to_datetime(weather_df["Timestamp"])
-    
-    # Create a proxy by averaging weather by Month, Day, Hour
-    weather_df["month"] = weather_df["Timestamp"].dt.month
-    weather_df["day"] = weather_df["Timestamp"].dt.day
-    weather_df["hour"] = weather_df["Timestamp"].dt.hour
-    
-    weather_proxy = weather_df.groupby(["month", "day", "hour"])[
-        ["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]
-    ].mean().reset_index()
-    
-    return weather_proxy
+    return weather_proxy.load_proxy(MODELS_DIR, WEATHER_DATA_PATH)
 
-def preprocess_data(df, weather_proxy):
+def preprocess_data(df, proxy):
     """Preprocesses the input dataframe for prediction."""
     print("Preprocessing data...")
     df = df.copy()
@@ -52,64 +45,38 @@ def preprocess_data(df, weather_proxy):
          
     df = df.dropna(subset=["timestamp"])
     
-    # Clean load_kW if it exists and is string
+    # Clean load_kW if it exists and is string (decimal comma)
     if "load_kW" in df.columns and df["load_kW"].dtype == object:
-        df["load_kW"] = df["load_kW"].astype(str).str.replace(",", ".").replace("", "0").astype(float)
+        df["load_kW"] = load_profiles.to_float(df["load_kW"]).values
     
     # Sort
     df = df.sort_values(["plant_id", "timestamp"]).reset_index(drop=True)
     
-    # Merge Weather
-    print("Merging weather proxy...")
+    # Weather: direct gather from the proxy table
     df["month"] = df["timestamp"].dt.month
     df["day"] = df["timestamp"].dt.day
     df["hour"] = df["timestamp"].dt.hour
-    
-    df = df.merge(weather_proxy, on=["month", "day", "hour"], how="left")
-    
-    # Fill missing weather
-    df[["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]] = \
-        df[["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]].ffill().bfill()
+    weather_proxy.add_weather(df, proxy)
         
     return df
 
 def create_features(df):
     """Creates features for the model."""
     print("Creating features...")
-    df = df.copy()
-    
-    # Time features
-    df["hour"] = df["timestamp"].dt.hour
-    df["dayofweek"] = df["timestamp"].dt.dayofweek
-    df["month"] = df["timestamp"].dt.month
-    df["is_weekend"] = df["dayofweek"].isin([5, 6]).astype(int)
-    
-    # Cyclical encoding
-    df["hour_sin"] = np.sin(2 * np.pi * df["hour"] / 24)
-    df["hour_cos"] = np.cos(2 * np.pi * df["hour"] / 24)
-    df["dow_sin"] = np.sin(2 * np.pi * df["dayofweek"] / 7)
-    df["dow_cos"] = np.cos(2 * np.pi * df["dayofweek"] / 7)
-    
-    # Lags
-    lags = [1, 2, 3, 4, 8, 95, 96, 97, 672] 
-    for lag in lags:
-        df[f"lag_{lag}"] = df.groupby("plant_id")["load_kW"].shift(lag)
-        
-    # Rolling stats (24h)
-    df["roll_mean_24h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(96).mean())
-    df["roll_std_24h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(96).std())
-    
-    # Short term rolling (1h = 4 steps)
-    df["roll_mean_1h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(4).mean())
-    df["roll_max_1h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(4).max())
-    df["roll_min_1h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(4).min())
-    
-    # Drop rows with NaNs created by lags/rolling (cannot predict for start of data)
-    # Alternatively, we could keep them and output NaN predictions, but the model will fail.
-    # For a robust script, we filter out rows where we can't form features.
-    df_clean = df.dropna().copy()
-    
-    return df_clean
+    # Same engine as train.py; rows without enough history (lags/rolling) are dropped.
+    return feature_engine.build_features(df)
+
+def stream_features(df, history):
+    """Creates features for one chunk from the bounded per-plant history (which it updates)."""
+    df = history.lag_features(df)
+    for k, v in feature_engine.calendar_columns(df["timestamp"]).items():
+        df[k] = v
+    return df.dropna()
+
+def _sniff_sep(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        header = f.readline()
+    return ";" if header.count(";") > header.count(",") else ","
 
 def predict(input_path, output_path=None):
     # Load resources
@@ -130,7 +97,7 @@ def predict(input_path, output_path=None):
     if input_path.endswith('.csv'):
         # Try different separators
         try:
-            df = pd.read_csv(input_path, sep=';')
+            df = pd.read_csv(input_path, sep=';', decimal=',')
             if "Time stamp" not in df.columns and "timestamp" not in df.columns:
                  df = pd.read_csv(input_path, sep=',')
         except:
@@ -139,8 +106,8 @@ def predict(input_path, output_path=None):
         raise ValueError("Input file must be a CSV.")
 
     # Process
-    weather_proxy = load_weather_proxy()
-    df_processed = preprocess_data(df, weather_proxy)
+    proxy = load_weather_proxy()
+    df_processed = preprocess_data(df, proxy)
     df_features = create_features(df_processed)
     
     if df_features.empty:
@@ -183,11 +150,71 @@ def predict(input_path, output_path=None):
     output_df.to_csv(output_path, index=False)
     print(f"Predictions saved to {output_path}")
 
+def predict_stream(input_path, output_path=None, chunksize=200000, state_path=None):
+    """Chunked prediction with constant memory: only the last 673 loads per plant are kept.
+
+    Input rows must be in time order per plant (across chunks); older rows are skipped.
+    With `state_path`, the history is restored before and saved after the run, so the
+    next run can start with new data only.
+    """
+    model_path = os.path.join(MODELS_DIR, "model.pkl")
+    encoder_path = os.path.join(MODELS_DIR, "encoder.pkl")
+    if not os.path.exists(model_path):
+        raise FileNotFoundError("Model file not found. Run train.py first.")
+    if not os.path.exists(encoder_path):
+        raise FileNotFoundError("Encoder file not found. Run train.py first.")
+
+    print("Loading model and encoder...")
+    model = joblib.load(model_path)
+    encoder = joblib.load(encoder_path)
+    with open(os.path.join(MODELS_DIR, "metadata.json"), "r") as f:
+        feature_cols = json.load(f)["features"]
+    known_plants = encoder.categories_[0]
+    proxy = load_weather_proxy()
+
+    if state_path and os.path.exists(state_path):
+        history = feature_engine.PlantHistory.load(state_path)
+        print(f"Restored history for {len(history.loads)} plants from {state_path}")
+    else:
+        history = feature_engine.PlantHistory()
+
+    if output_path is None:
+        output_path = input_path.replace(".csv", "_predictions.csv")
+    written = 0
+    first = True
+    sep = _sniff_sep(input_path)
+    reader = pd.read_csv(input_path, sep=sep, decimal="," if sep == ";" else ".", chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        df_features = stream_features(preprocess_data(chunk, proxy), history)
+        df_features = df_features[df_features["plant_id"].isin(known_plants)]
+        if not df_features.empty:
+            df_features["plant_id_enc"] = encoder.transform(df_features[["plant_id"]])
+            df_features["predicted_load_kW_1h_ahead"] = model.predict(df_features[feature_cols])
+            df_features[["timestamp", "plant_id", "load_kW", "predicted_load_kW_1h_ahead"]].to_csv(
+                output_path, mode="w" if first else "a", header=first, index=False)
+            first = False
+            written += len(df_features)
+        print(f"Chunk {i + 1}: {len(chunk)} rows in, {written} predictions written so far")
+
+    if first:
+        print("No data available for prediction after feature engineering (not enough history?).")
+    else:
+        print(f"Predictions saved to {output_path}")
+    if state_path:
+        history.save(state_path)
+        print(f"History saved to {state_path}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Predict 1h ahead load for industrial plants.")
     parser.add_argument("input_file", help="Path to input CSV file")
     parser.add_argument("--output", help="Path to output CSV file", default=None)
+    parser.add_argument("--stream", action="store_true", help="Read the input in chunks with bounded per-plant history")
+    parser.add_argument("--chunksize", type=int, default=200000, help="Rows per chunk in --stream mode")
+    parser.add_argument("--state", help="History file (.npz) restored before and saved after a --stream run", default=None)
     
     args = parser.parse_args()
     
-    predict(args.input_file, args.output)
+    if args.stream:
+        predict_stream(args.input_file, args.output, args.chunksize, args.state)
+    else:
+        predict(args.input_file, args.output)
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import warnings
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import joblib
+try:
+    from src import feature_engine
+    from src import weather_proxy
+    from src import predict as batch_predict
+except ImportError:
+    import feature_engine
+    import weather_proxy
+    import predict as batch_predict
+
+warnings.filterwarnings('ignore')
+
+# --- Config ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+WEATHER_COLS = weather_proxy.WEATHER_COLS
+HISTORY = feature_engine.history_size()  # lag_672 needs the newest record plus 672 before it
+MAX_BATCH = 256
+MAX_WAIT_S = 0.0
+LATENCY_WINDOW = 4096
+
+# Long-running prediction service:
+# - model, encoder, metadata and weather proxy are loaded once at startup
+# - each plant keeps a ring buffer of its last HISTORY loads (15 min steps)
+# - POST /observe appends records, POST /predict appends and answers 1h ahead
+# - concurrent /predict calls are micro-batched into one model.predict call: the
+#   batcher takes whatever queued up while the previous batch was predicting
+#   (plus an optional MAX_WAIT_S linger), so a lone request is not delayed
+
+class MicroBatcher:
+    def __init__(self, model, features, max_batch=MAX_BATCH, max_wait=MAX_WAIT_S):
+        self.model = model
+        self.features = features
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.q = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, row):
+        fut = Future()
+        self.q.put((row, fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self.q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.q.get_nowait() if remaining <= 0 else self.q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            X = pd.DataFrame(np.array([r for r, _ in batch], dtype=np.float64), columns=self.features)
+            try:
+                preds = self.model.predict(X)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, fut), p in zip(batch, preds):
+                fut.set_result(float(p))
+
+class PlantState:
+    def __init__(self):
+        self.loads = deque(maxlen=HISTORY)
+        self.last_ts = None
+
+class Service:
+    def __init__(self, models_dir=MODELS_DIR, proxy=None):
+        print("Loading model, encoder and metadata...")
+        self.model = joblib.load(os.path.join(models_dir, "model.pkl"))
+        encoder = joblib.load(os.path.join(models_dir, "encoder.pkl"))
+        with open(os.path.join(models_dir, "metadata.json"), "r") as f:
+            self.features = json.load(f)["features"]
+        # OrdinalEncoder codes are the positions in categories_
+        self.plant_codes = {str(p): float(i) for i, p in enumerate(encoder.categories_[0])}
+        if proxy is None:
+            proxy = batch_predict.load_weather_proxy()
+        self.weather_proxy = proxy
+        self.plants = {}
+        self.lock = threading.Lock()
+        self.batcher = MicroBatcher(self.model, self.features)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+
+    def observe(self, items):
+        # Appends a batch of {plant_id, timestamp, load_kW} records; returns the
+        # parsed records and a copy of each plant history (oldest first) right
+        # after its record. The whole batch is parsed and checked before any
+        # buffer changes, so a rejected batch leaves no partial history behind.
+        records = []
+        for it in items:
+            load = it.get("load_kW")
+            records.append((str(it["plant_id"]), pd.Timestamp(it["timestamp"]), np.nan if load is None else float(load)))
+        with self.lock:
+            last = {}
+            for plant_id, ts, _ in records:
+                prev = last.get(plant_id)
+                if prev is None and plant_id in self.plants:
+                    prev = self.plants[plant_id].last_ts
+                if prev is not None and ts <= prev:
+                    raise ValueError(f"timestamp {ts} is not after the last record of {plant_id} ({prev})")
+                last[plant_id] = ts
+            histories = []
+            for plant_id, ts, load in records:
+                st = self.plants.setdefault(plant_id, PlantState())
+                st.loads.append(load)
+                st.last_ts = ts
+                histories.append(list(st.loads))
+        return records, histories
+
+    def feature_row(self, plant_id, ts, load, history):
+        lag = feature_engine.latest_features(history)
+        if lag is None:
+            return None, f"{plant_id} has {len(history)} of {HISTORY} records needed"
+        hour, dow = ts.hour, ts.dayofweek
+        row = {
+            "load_kW": load, "month": ts.month, "day": ts.day, "hour": hour,
+            "dayofweek": dow, "is_weekend": int(dow >= 5),
+            "hour_sin": np.sin(2 * np.pi * hour / 24), "hour_cos": np.cos(2 * np.pi * hour / 24),
+            "dow_sin": np.sin(2 * np.pi * dow / 7), "dow_cos": np.cos(2 * np.pi * dow / 7),
+            "plant_id_enc": self.plant_codes.get(plant_id, np.nan),
+        }
+        row.update(zip(WEATHER_COLS, self.weather_proxy[ts.month - 1, ts.day - 1, ts.hour].tolist()))
+        row.update(lag)
+        values = [row.get(f, np.nan) for f in self.features]
+        if not np.all(np.isfinite(values)):
+            missing = [f for f, v in zip(self.features, values) if not np.isfinite(v)]
+            return None, f"missing features for {plant_id}: {missing}"
+        return values, None
+
+    def predict_many(self, items):
+        # items: [{plant_id, timestamp, load_kW}]; the batch is observed, then all rows go through the batcher
+        pending = []
+        records, histories = self.observe(items)
+        for (plant_id, ts, load), history in zip(records, histories):
+            row, err = self.feature_row(plant_id, ts, load, history)
+            out = {"plant_id": plant_id, "timestamp": str(ts), "target_timestamp": str(ts + pd.Timedelta(hours=1))}
+            pending.append((out, self.batcher.submit(row) if row is not None else None, err))
+        results = []
+        for out, fut, err in pending:
+            if fut is None:
+                out["error"] = err
+            else:
+                out["predicted_load_kW_1h_ahead"] = fut.result()
+            results.append(out)
+        return results
+
+    def observe_many(self, items):
+        self.observe(items)
+        return {"observed": len(items)}
+
+    def record_request(self, seconds):
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(seconds)
+
+    def seed(self, df):
+        # Warm the buffers from a long frame (timestamp, plant_id, load_kW) sorted by plant and time
+        df = df.sort_values(["plant_id", "timestamp"])
+        for plant_id, g in df.groupby("plant_id", sort=False):
+            g = g.tail(HISTORY)
+            with self.lock:
+                st = self.plants.setdefault(str(plant_id), PlantState())
+                st.loads.extend(g["load_kW"].astype(float).tolist())
+                st.last_ts = pd.Timestamp(g["timestamp"].iloc[-1])
+        return len(self.plants)
+
+    def metrics(self):
+        with self.lock:
+            requests, lat = self.requests, list(self.latencies)
+        lat = np.array(lat) * 1000.0 if lat else np.array([np.nan])
+        return {
+            "requests": requests,
+            "plants": len(self.plants),
+            "batches": self.batcher.batches,
+            "rows_predicted": self.batcher.rows,
+            "mean_batch": self.batcher.rows / self.batcher.batches if self.batcher.batches else 0.0,
+            "latency_ms": {"p50": float(np.nanpercentile(lat, 50)), "p95": float(np.nanpercentile(lat, 95)),
+                           "p99": float(np.nanpercentile(lat, 99))},
+        }
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, obj, status=200):
+            data = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            n = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(n) or b"null")
+            return payload if isinstance(payload, list) else [payload]
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send({"status": "ok", "plants": len(service.plants)})
+            elif self.path == "/metrics":
+                self._send(service.metrics())
+            else:
+                self._send({"error": "not found"}, 404)
+
+        def do_POST(self):
+            t0 = time.perf_counter()
+            try:
+                items = self._body()
+                if self.path == "/predict":
+                    res = service.predict_many(items)
+                    self._send(res if len(res) > 1 else res[0])
+                elif self.path == "/observe":
+                    self._send(service.observe_many(items))
+                else:
+                    self._send({"error": "not found"}, 404)
+                    return
+            except (ValueError, KeyError, TypeError) as e:
+                self._send({"error": str(e)}, 400)
+                return
+            service.record_request(time.perf_counter() - t0)
+
+        def log_message(self, fmt, *args):
+            pass
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve 1h ahead load predictions for industrial plants.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--history", help="Long CSV (timestamp, plant_id, load_kW) used to warm the buffers", default=None)
+    args = parser.parse_args()
+    service = Service()
+    if args.history:
+        sep = batch_predict._sniff_sep(args.history)
+        df = pd.read_csv(args.history, sep=sep, decimal="," if sep == ";" else ".")
+        n = service.seed(batch_predict.preprocess_data(df, service.weather_proxy))
+        print(f"Warm history for {n} plants")
+    server = PredictionServer((args.host, args.port), make_handler(service))
+    print(f"Serving on http://{args.host}:{args.port} (POST /predict, POST /observe, GET /metrics)")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
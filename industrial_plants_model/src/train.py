@@ -9,6 +9,14 @@ from sklearn.preprocessing import OrdinalEncoder
 import joblib
 import json
 import warnings
+try:
+    from src import feature_engine
+    from src import load_profiles
+    from src import weather_proxy
+except ImportError:
+    import feature_engine
+    import load_profiles
+    import weather_proxy
 
 warnings.filterwarnings('ignore')
 
@@ -24,111 +32,28 @@ os.makedirs(MODELS_DIR, exist_ok=True)
 
 def load_data():
     print("Loading data...")
-    # Load 2016
-    df_2016 = pd.read_csv(
-        os.path.join(DATA_DIR, "LoadProfile_20IPs_2016.csv"),
-        sep=";", header=1, low_memory=False
-    )
-    df_2016 = df_2016.rename(columns={"Time stamp": "timestamp"})
-    
-    # Load 2017
-    df_2017 = pd.read_csv(
-        os.path.join(DATA_DIR, "LoadProfile_30IPs_2017.csv"),
-        sep=";", header=1, low_memory=False
-    )
-    df_2017 = df_2017.rename(columns={"Time stamp": "timestamp"})
-
-    # Melt and Unique IDs
-    print("Melting 2016...")
-    df_long_16 = df_2016.melt(id_vars="timestamp", var_name="plant_id", value_name="load_kW")
-    df_long_16["plant_id"] = "2016_" + df_long_16["plant_id"].str.replace("LG ", "")
-    
-    print("Melting 2017...")
-    df_long_17 = df_2017.melt(id_vars="timestamp", var_name="plant_id", value_name="load_kW")
-    df_long_17["plant_id"] = "2017_" + df_long_17["plant_id"].str.replace("LG ", "")
-    
-    # Concat
-    df = pd.concat([df_long_16, df_long_17], ignore_index=True)
-    
-    # Parse timestamps
-    print("Parsing timestamps...")
-    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%d.%m.%Y %H:%M:%S", errors='coerce')
-    df = df.dropna(subset=["timestamp"])
-    
-    # Clean load_kW
-    df["load_kW"] = df["load_kW"].astype(str).str.replace(",", ".").replace("", "0").astype(float)
+    # Wide CSVs parsed with decimal=',' and melted as arrays (cached under data/processed)
+    df = load_profiles.load_long(DATA_DIR)
     
     df = df.sort_values(["plant_id", "timestamp"]).reset_index(drop=True)
     
-    # --- Load Weather Data (2018-2023) ---
+    # --- Weather Proxy (2018-2023 means per month/day/hour) ---
+    # Dense 12x31x24x4 table saved in models/ (rebuilt when the source CSV changes);
+    # Feb 29 and empty slots are filled inside the table, not across plants.
     print("Loading Weather Data Proxy...")
-    weather_df = pd.read_csv(
-        os.path.join(os.path.dirname(DATA_DIR), "Hourly Power Load and Climate Data", "PowerLoad_Dataset.csv")
-    )
-    weather_df["Timestamp"] = pd.to_datetime(weather_df["Timestamp"])
-    
-    # Create a proxy by averaging weather by Month, Day, Hour
-    weather_df["month"] = weather_df["Timestamp"].dt.month
-    weather_df["day"] = weather_df["Timestamp"].dt.day
-    weather_df["hour"] = weather_df["Timestamp"].dt.hour
-    
-    weather_proxy = weather_df.groupby(["month", "day", "hour"])[
-        ["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]
-    ].mean().reset_index()
-    
-    # Merge proxy back to main dataframe
-    print("Merging weather proxy...")
+    proxy = weather_proxy.load_proxy(MODELS_DIR, rebuild=True)
     df["month"] = df["timestamp"].dt.month
     df["day"] = df["timestamp"].dt.day
     df["hour"] = df["timestamp"].dt.hour
-    
-    df = df.merge(weather_proxy, on=["month", "day", "hour"], how="left")
-    
-    # Fill missing weather (e.g. Feb 29 or rare gaps) with forward fill
-    df[["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]] = \
-        df[["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]].ffill().bfill()
+    weather_proxy.add_weather(df, proxy)
         
     return df
 
 def create_features(df):
     print("Creating features...")
-    df = df.copy()
-    
-    # Time features
-    df["hour"] = df["timestamp"].dt.hour
-    df["dayofweek"] = df["timestamp"].dt.dayofweek
-    df["month"] = df["timestamp"].dt.month
-    df["is_weekend"] = df["dayofweek"].isin([5, 6]).astype(int)
-    
-    # Cyclical encoding
-    df["hour_sin"] = np.sin(2 * np.pi * df["hour"] / 24)
-    df["hour_cos"] = np.cos(2 * np.pi * df["hour"] / 24)
-    df["dow_sin"] = np.sin(2 * np.pi * df["dayofweek"] / 7)
-    df["dow_cos"] = np.cos(2 * np.pi * df["dayofweek"] / 7)
-    
-    # Target: 1 hour ahead (4 steps)
-    HORIZON = 4
-    df["target"] = df.groupby("plant_id")["load_kW"].shift(-HORIZON)
-    
-    # Lags
-    # IMPORTANT: Include lags 1, 2, 3 (recent past) and 4 (1h ago)
-    # Also include load_kW (current) in the feature list during training
-    # Added lags around 24h (95, 97) and 1 week (672)
-    lags = [1, 2, 3, 4, 8, 95, 96, 97, 672] 
-    for lag in lags:
-        df[f"lag_{lag}"] = df.groupby("plant_id")["load_kW"].shift(lag)
-        
-    # Rolling stats (24h)
-    df["roll_mean_24h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(96).mean())
-    df["roll_std_24h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(96).std())
-    
-    # Short term rolling (1h = 4 steps)
-    df["roll_mean_1h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(4).mean())
-    df["roll_max_1h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(4).max())
-    df["roll_min_1h"] = df.groupby("plant_id")["load_kW"].transform(lambda x: x.shift(1).rolling(4).min())
-    
-    df = df.dropna()
-    return df
+    # Calendar, lags (1, 2, 3, 4, 8, 95, 96, 97, 672), 24h/1h rolling stats and the
+    # 1h-ahead target (4 steps) are built by the dense per-plant feature engine.
+    return feature_engine.build_features(df, horizon=feature_engine.HORIZON)
 
 def global_time_cv(df, features, target, n_folds=3):
     print("Running global time-based CV...")
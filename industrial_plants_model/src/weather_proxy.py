@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pandas as pd
+
+# --- Weather proxy ---
+# Mean weather per calendar slot (month, day, hour) from the 2018-2023
+# PowerLoad dataset, materialized once as a dense 12 x 31 x 24 x 4 float32 array
+# next to the model artifacts. Joining is an integer-index gather, no merge.
+# Fill policy, applied per variable:
+# - Feb 29 slots are always copied from Feb 28 at the same hour (leap days are
+#   too sparse in the source to average on their own)
+# - any other real date left empty takes the last filled slot before it in
+#   calendar order (wrapping from Dec 31 to Jan 1)
+# - impossible dates (Feb 30, Apr 31, ...) stay NaN and are never gathered
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+SOURCE_PATH = os.path.join(os.path.dirname(BASE_DIR), "Hourly Power Load and Climate Data", "PowerLoad_Dataset.csv")
+PROXY_FILE = "weather_proxy.npz"
+WEATHER_COLS = ["Temperature_C", "Humidity_%", "WindSpeed_mps", "Precipitation_mm"]
+SHAPE = (12, 31, 24)
+
+def _real_slots():
+    # (month, day) pairs that exist in a leap year, in calendar order
+    days = pd.date_range("2016-01-01", "2016-12-31", freq="D")
+    return days.month.values - 1, days.day.values - 1
+
+def build_proxy(source_path=SOURCE_PATH):
+    print("Building weather proxy...")
+    w = pd.read_csv(source_path, usecols=["Timestamp"] + WEATHER_COLS)
+    ts = pd.DatetimeIndex(pd.to_datetime(w["Timestamp"]))
+    slot = np.ravel_multi_index((ts.month.values - 1, ts.day.values - 1, ts.hour.values), SHAPE)
+    size = int(np.prod(SHAPE))
+    proxy = np.full(SHAPE + (len(WEATHER_COLS),), np.nan, dtype=np.float32)
+    for j, c in enumerate(WEATHER_COLS):
+        v = pd.to_numeric(w[c], errors="coerce").to_numpy(dtype=np.float64)
+        ok = np.isfinite(v)
+        n = np.bincount(slot[ok], minlength=size)
+        s = np.bincount(slot[ok], weights=v[ok], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            proxy[..., j] = (s / n).reshape(SHAPE)
+    return fill_policy(proxy)
+
+def fill_policy(proxy):
+    proxy = proxy.copy()
+    proxy[1, 28] = proxy[1, 27]
+    m, d = _real_slots()
+    seq = proxy[m, d].reshape(len(m) * SHAPE[2], -1)  # calendar order: day by day, hour by hour
+    for j in range(seq.shape[1]):
+        col = seq[:, j]
+        ok = np.isfinite(col)
+        if not ok.any() or ok.all():
+            continue
+        idx = np.where(ok, np.arange(len(col)), -1)
+        idx = np.maximum.accumulate(idx)
+        last = np.flatnonzero(ok)[-1]
+        col[:] = np.where(idx >= 0, col[np.maximum(idx, 0)], col[last])
+    proxy[m, d] = seq.reshape(len(m), SHAPE[2], -1)
+    return proxy
+
+def proxy_path(models_dir=MODELS_DIR):
+    return os.path.join(models_dir, PROXY_FILE)
+
+def save_proxy(proxy, models_dir=MODELS_DIR):
+    os.makedirs(models_dir, exist_ok=True)
+    path = proxy_path(models_dir)
+    np.savez(path, proxy=proxy, columns=np.array(WEATHER_COLS))
+    return path
+
+def load_proxy(models_dir=MODELS_DIR, source_path=SOURCE_PATH, rebuild=False):
+    """Saved proxy array; rebuilt from the source CSV when missing or older than it."""
+    path = proxy_path(models_dir)
+    stale = os.path.exists(source_path) and os.path.exists(path) and os.path.getmtime(source_path) > os.path.getmtime(path)
+    if os.path.exists(path) and not rebuild and not stale:
+        with np.load(path) as z:
+            return z["proxy"]
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Weather data not found at {source_path}")
+    proxy = build_proxy(source_path)
+    save_proxy(proxy, models_dir)
+    return proxy
+
+def gather(proxy, month, day, hour):
+    """(n, 4) weather rows for 1-based month/day and hour arrays."""
+    return proxy[np.asarray(month) - 1, np.asarray(day) - 1, np.asarray(hour)]
+
+def add_weather(df, proxy):
+    # Expects month/day/hour columns; writes WEATHER_COLS in place
+    vals = gather(proxy, df["month"].to_numpy(), df["day"].to_numpy(), df["hour"].to_numpy())
+    for j, c in enumerate(WEATHER_COLS):
+        df[c] = vals[:, j]
+    return df
+
+def main():
+    path = save_proxy(build_proxy())
+    print(f"Weather proxy saved to {path}")
+
+if __name__ == "__main__":
+    main()